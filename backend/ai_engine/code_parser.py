@@ -1,17 +1,27 @@
-import re
+from services.code_parser import scan_code_blocks, join_blocks
+
 
 class CodeParser:
+    """Extract code from HTML:/CSS:/JS: labeled (or fenced) model output."""
+
+    @staticmethod
+    def parse(generated_text):
+        """Extract html/css/js in a single scan of the text."""
+        blocks = scan_code_blocks(generated_text)
+        return {
+            'html': join_blocks(blocks, 'html'),
+            'css': join_blocks(blocks, 'css'),
+            'js': join_blocks(blocks, 'js'),
+        }
+
     @staticmethod
     def extract_html(generated_text):
-        html_match = re.search(r'HTML:(.*?)(?:CSS:|$)', generated_text, re.DOTALL)
-        return html_match.group(1).strip() if html_match else ""
-    
+        return join_blocks(scan_code_blocks(generated_text), 'html')
+
     @staticmethod
     def extract_css(generated_text):
-        css_match = re.search(r'CSS:(.*?)(?:JS:|$)', generated_text, re.DOTALL)
-        return css_match.group(1).strip() if css_match else ""
-    
+        return join_blocks(scan_code_blocks(generated_text), 'css')
+
     @staticmethod
     def extract_js(generated_text):
-        js_match = re.search(r'JS:(.*?)$', generated_text, re.DOTALL)
-        return js_match.group(1).strip() if js_match else ""
+        return join_blocks(scan_code_blocks(generated_text), 'js')
@@ -1,41 +1,261 @@
-from transformers import AutoTokenizer, AutoModelForCausalLM
-import torch
+import copy
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from services.prompt_budget import PromptBudget, minify_template
+
+
+class MicroBatcher:
+    """
+    Gather concurrent requests into batches for a single worker thread.
+
+    The first request in a batch waits at most max_wait_ms for others to
+    arrive; the batch is flushed early once max_batch_size is reached.
+    """
+
+    def __init__(self, run_batch, max_batch_size=8, max_wait_ms=20):
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def submit(self, item):
+        """Queue an item and block until its batch has been processed."""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((item, future))
+        return future.result()
+
+    def _ensure_worker(self):
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._loop, name='llama-batcher', daemon=True)
+                    self._worker.start()
+
+    def _loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            items = [item for item, _ in batch]
+            try:
+                results = self.run_batch(items)
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+
 
 class LlamaWebGenerator:
-    def __init__(self):
-        self.model_name = "meta-llama/Llama-2-7b-chat-hf"
-        self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-        self.model = AutoModelForCausalLM.from_pretrained(
-            self.model_name,
-            torch_dtype=torch.float16,
-            device_map="auto",
-            load_in_8bit=True  # For memory optimization
+    # Fixed instructions come first so their KV-cache can be shared across requests
+    SYSTEM_PROMPT = """You are an expert web developer. Generate clean,
+semantic HTML, modern CSS, and vanilla JavaScript.
+
+Generate ONLY the code without explanations. Use this format:
+HTML:
+[html code]
+
+CSS:
+[css code]
+
+JS:
+[javascript code if needed]
+"""
+
+    def __init__(self, model_name=None, device=None, max_batch_size=None, max_wait_ms=None):
+        # Heavy imports are deferred so importing this module stays cheap
+        from transformers import AutoTokenizer, AutoModelForCausalLM
+        import torch
+
+        self.model_name = model_name or os.environ.get("LLAMA_MODEL_ID", "meta-llama/Llama-2-7b-chat-hf")
+        self.device = device or os.environ.get("LLAMA_DEVICE") or ("cuda" if torch.cuda.is_available() else "cpu")
+
+        # Left padding keeps every prompt flush against its generated tokens
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_name, padding_side="left")
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+
+        if self.device == "cuda":
+            self.model = AutoModelForCausalLM.from_pretrained(
+                self.model_name,
+                torch_dtype=torch.float16,
+                device_map="auto",
+                load_in_8bit=True  # For memory optimization
+            )
+        else:
+            # 8-bit loading needs CUDA; CPU nodes run full precision
+            self.model = AutoModelForCausalLM.from_pretrained(
+                self.model_name,
+                torch_dtype=torch.float32,
+            ).to(self.device)
+        self.model.eval()
+
+        # Prompt and completion share the context window; base templates are
+        # trimmed (counted with the model's tokenizer) to leave room for output
+        self.context_window = int(
+            os.environ.get("LLAMA_CONTEXT_WINDOW")
+            or getattr(self.model.config, "max_position_embeddings", None)
+            or 4096
         )
-    
-    def generate_code(self, prompt, component_type):
-        system_prompt = f"""You are an expert web developer. Generate clean, 
-        semantic HTML, modern CSS, and vanilla JavaScript for a {component_type}.
-        
-        User Request: {prompt}
-        
-        Generate ONLY the code without explanations. Use this format:
-        HTML:
-        [html code]
-        
-        CSS:
-        [css code]
-        
-        JS:
-        [javascript code if needed]
+        self.max_new_tokens = int(os.environ.get("LLAMA_MAX_NEW_TOKENS", 2048))
+        self.prompt_budget = PromptBudget(
+            context_window=self.context_window,
+            max_new_tokens=self.max_new_tokens,
+            min_new_tokens=int(os.environ.get("LLAMA_MIN_NEW_TOKENS", 1024)),
+            count_tokens=self._count_tokens,
+            safety_margin=0,
+        )
+
+        # Past key/values of shared prompt prefixes (system prompt, system + template)
+        self.reuse_prefix = os.environ.get("LLAMA_PREFIX_CACHE", "1") == "1"
+        self.prefix_cache_size = int(os.environ.get("LLAMA_PREFIX_CACHE_SIZE", 16))
+        self._prefix_cache = OrderedDict()
+        self._prefix_lock = threading.Lock()
+
+        self.batcher = MicroBatcher(
+            self._generate_batch,
+            max_batch_size=max_batch_size or int(os.environ.get("LLAMA_MAX_BATCH_SIZE", 8)),
+            max_wait_ms=max_wait_ms if max_wait_ms is not None else float(os.environ.get("LLAMA_BATCH_WAIT_MS", 20)),
+        )
+
+    def build_prompt(self, prompt, component_type, template=None):
+        """Split the prompt into a shareable prefix and a per-request suffix."""
+        prefix = self.SYSTEM_PROMPT
+        suffix = f"\nComponent: {component_type}\nUser Request: {prompt}\n"
+        if template:
+            fragment, _, _ = self.prompt_budget.fit_fragment(
+                self._count_tokens(prefix) + self._count_tokens(suffix),
+                self._template_fragment(minify_template(template)),
+                template,
+                self._template_fragment,
+            )
+            prefix += fragment
+        return prefix, suffix
+
+    @staticmethod
+    def _template_fragment(template):
+        return (
+            "\nUse the following template as a starting point:\n"
+            f"Template HTML:\n{template.get('html_template', '')}\n"
+            f"Template CSS:\n{template.get('css_template', '')}\n"
+        )
+
+    def _count_tokens(self, text):
+        return len(self.tokenizer(text, add_special_tokens=False)["input_ids"])
+
+    def generate_code(self, prompt, component_type, template=None):
+        """Generate code for one request; concurrent callers are batched together."""
+        return self.batcher.submit(self.build_prompt(prompt, component_type, template))
+
+    def _generate_batch(self, items):
+        """Run model.generate once per distinct prefix in the batch and split the outputs."""
+        groups = OrderedDict()
+        for index, (prefix, suffix) in enumerate(items):
+            groups.setdefault(prefix, []).append((index, suffix))
+
+        results = [None] * len(items)
+        for prefix, members in groups.items():
+            outputs = self._generate_group(prefix, [suffix for _, suffix in members])
+            for (index, _), output in zip(members, outputs):
+                results[index] = output
+        return results
+
+    def _generate_group(self, prefix, suffixes):
+        import torch
+
+        inputs = self.prepare_inputs(prefix, suffixes)
+        # Cap the completion by what the (padded) prompt leaves of the context window
+        prompt_length = inputs["input_ids"].shape[1]
+        max_new_tokens = max(1, min(self.max_new_tokens, self.context_window - prompt_length))
+        with torch.no_grad():
+            outputs = self.model.generate(
+                **inputs,
+                max_new_tokens=max_new_tokens,
+                temperature=0.7,
+                top_p=0.9,
+                do_sample=True,
+                pad_token_id=self.tokenizer.pad_token_id,
+            )
+
+        # Drop the (padded) prompt so each caller only gets its own completion
+        return self.tokenizer.batch_decode(outputs[:, prompt_length:], skip_special_tokens=True)
+
+    def prepare_inputs(self, prefix, suffixes, reuse_prefix=None):
+        """
+        Build model.generate kwargs for suffixes sharing one prefix.
+
+        Suffixes are left-padded, so padding sits between the prefix and the
+        request text and is masked out. With prefix reuse, the cached past
+        key/values are expanded to the batch and only suffix tokens are prefilled.
         """
-        
-        inputs = self.tokenizer(system_prompt, return_tensors="pt").to("cuda")
-        outputs = self.model.generate(
-            **inputs,
-            max_length=2048,
-            temperature=0.7,
-            top_p=0.9,
-            do_sample=True
+        import torch
+
+        reuse_prefix = self.reuse_prefix if reuse_prefix is None else reuse_prefix
+        prefix_ids, prefix_cache = self._prefix_state(prefix, compute_cache=reuse_prefix)
+
+        encoded = self.tokenizer(suffixes, return_tensors="pt", padding=True, add_special_tokens=False)
+        batch_size = len(suffixes)
+        device = self.model.device
+        input_ids = torch.cat(
+            [prefix_ids.expand(batch_size, -1), encoded["input_ids"].to(device)], dim=1
+        )
+        attention_mask = torch.cat(
+            [torch.ones_like(prefix_ids).expand(batch_size, -1), encoded["attention_mask"].to(device)], dim=1
+        )
+
+        inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if reuse_prefix:
+            # generate() extends the cache in place, so each batch gets its own copy
+            inputs["past_key_values"] = self._expand_cache(prefix_cache, batch_size)
+        return inputs
+
+    def _prefix_state(self, prefix, compute_cache=True):
+        """Return (prefix input ids, prefix past key/values), computing them once per prefix."""
+        import torch
+
+        with self._prefix_lock:
+            state = self._prefix_cache.get(prefix)
+            if state is not None:
+                self._prefix_cache.move_to_end(prefix)
+                if state[1] is not None or not compute_cache:
+                    return state
+
+        prefix_ids = self.tokenizer(prefix, return_tensors="pt")["input_ids"].to(self.model.device)
+        prefix_cache = None
+        if compute_cache:
+            with torch.no_grad():
+                prefix_cache = self.model(prefix_ids, use_cache=True).past_key_values
+
+        with self._prefix_lock:
+            self._prefix_cache[prefix] = (prefix_ids, prefix_cache)
+            self._prefix_cache.move_to_end(prefix)
+            while len(self._prefix_cache) > self.prefix_cache_size:
+                self._prefix_cache.popitem(last=False)
+        return prefix_ids, prefix_cache
+
+    @staticmethod
+    def _expand_cache(cache, batch_size):
+        cache = copy.deepcopy(cache)
+        if hasattr(cache, "batch_repeat_interleave"):
+            cache.batch_repeat_interleave(batch_size)
+            return cache
+        # Legacy tuple-of-tensors format
+        return tuple(
+            tuple(tensor.repeat_interleave(batch_size, dim=0) for tensor in layer) for layer in cache
         )
-        
-        return self.tokenizer.decode(outputs[0], skip_special_tokens=True)
@@ -0,0 +1,67 @@
+import threading
+import time
+
+
+class ModelLoader:
+    """
+    Thread-safe, build-on-first-use holder for an expensive object.
+
+    get() constructs the object once, even when many threads ask for it at
+    the same time; warm_up() starts construction in the background so the
+    server can listen (and answer health checks) while the model loads.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self._instance = None
+        self._error = None
+        self._status = 'cold'
+        self._load_seconds = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Return the instance, building it on first use; re-raises a failed load."""
+        if self._instance is not None:
+            return self._instance
+        with self._lock:
+            if self._instance is None:
+                self._load()
+            if self._instance is None:
+                raise RuntimeError(f"Model failed to load: {self._error}")
+        return self._instance
+
+    def warm_up(self):
+        """Start loading in a daemon thread; returns immediately."""
+        thread = threading.Thread(target=self._warm_up, name='model-warmup', daemon=True)
+        thread.start()
+        return thread
+
+    def _warm_up(self):
+        try:
+            self.get()
+        except RuntimeError as e:
+            print(f"Model warm-up failed: {e}")
+
+    def _load(self):
+        self._status = 'loading'
+        self._error = None
+        started = time.monotonic()
+        try:
+            self._instance = self.factory()
+            self._status = 'ready'
+        except Exception as e:
+            self._error = str(e)
+            self._status = 'failed'
+        finally:
+            self._load_seconds = time.monotonic() - started
+
+    @property
+    def ready(self):
+        return self._instance is not None
+
+    def status(self):
+        return {
+            'status': self._status,
+            'error': self._error,
+            'load_seconds': self._load_seconds,
+        }
@@ -1,36 +1,38 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from ai_engine.llama_generator import LlamaWebGenerator
+from ai_engine.model_loader import ModelLoader
 from ai_engine.code_parser import CodeParser
 from database.db_manager import DatabaseManager
+from services.prompt_classifier import classify_prompt
 import os
 
 app = Flask(__name__)
 CORS(app)
 
-# Initialize components
-llama_gen = LlamaWebGenerator()
+# Initialize components; the model is built on first use (or warmed up in the background)
+llama_loader = ModelLoader(LlamaWebGenerator)
 db = DatabaseManager()
 
+if os.environ.get("LLAMA_WARMUP", "0") == "1":
+    llama_loader.warm_up()
+
+@app.teardown_appcontext
+def remove_db_session(exception=None):
+    """Release the request's database session back to the pool."""
+    db.remove()
+
 def analyze_prompt(prompt):
     """Basic analysis of the prompt to determine website type."""
-    prompt_lower = prompt.lower()
-    if "landing page" in prompt_lower:
-        return "landing_page"
-    elif "portfolio" in prompt_lower:
-        return "portfolio"
-    elif "blog" in prompt_lower:
-        return "blog"
-    elif "ecommerce" in prompt_lower or "shop" in prompt_lower:
-        return "ecommerce"
-    return "generic"
+    return classify_prompt(prompt)['category']
 
 def parse_and_structure(generated_text):
     """Parse the raw generated text into structured code."""
+    code = CodeParser.parse(generated_text)
     return {
-        "html_code": CodeParser.extract_html(generated_text),
-        "css_code": CodeParser.extract_css(generated_text),
-        "js_code": CodeParser.extract_js(generated_text),
+        "html_code": code['html'],
+        "css_code": code['css'],
+        "js_code": code['js'],
         "metadata": {}
     }
 
@@ -49,7 +51,7 @@ def generate_website():
         # Generate components
         # Append website type to context to guide generation
         context_prompt = f"Type: {website_type}. {user_prompt}"
-        html = llama_gen.generate_code(context_prompt, "full website")
+        html = llama_loader.get().generate_code(context_prompt, "full website")
         
         # Parse and structure code
         structured_code = parse_and_structure(html)
@@ -66,6 +68,17 @@ def generate_website():
         print(f"Error generating website: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/health', methods=['GET'])
+def health():
+    """Liveness check; answers as soon as the process is listening."""
+    return jsonify({'status': 'ok'})
+
+@app.route('/api/ready', methods=['GET'])
+def ready():
+    """Readiness check; 503 until the model has finished loading."""
+    status = llama_loader.status()
+    return jsonify(status), (200 if llama_loader.ready else 503)
+
 @app.route('/api/preview/<project_id>', methods=['GET'])
 def preview_website(project_id):
     project = db.get_project(project_id)
@@ -80,4 +93,4 @@ def export_website(project_id):
 
 if __name__ == '__main__':
     port = int(os.environ.get("PORT", 5000))
-    app.run(debug=True, port=port)
+    app.run(debug=True, port=port, threaded=True)
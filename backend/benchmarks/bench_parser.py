@@ -0,0 +1,107 @@
+"""
+Compare the single-pass code scanner with the previous regex parsers.
+
+Usage: python benchmarks/bench_parser.py [size_kb] [runs]
+"""
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.code_parser import parse_generated_code, scan_code_blocks
+
+
+# ── Previous implementations, kept here for comparison ────────────────────────
+
+def legacy_extract_block(text, language):
+    match = re.search(rf'```{language}\s*(.*?)```', text, re.DOTALL | re.IGNORECASE)
+    return match.group(1).strip() if match else ''
+
+
+def legacy_parse_generated_code(raw_text):
+    html = legacy_extract_block(raw_text, 'html')
+    css = legacy_extract_block(raw_text, 'css')
+    js = legacy_extract_block(raw_text, 'javascript') or legacy_extract_block(raw_text, 'js')
+    if not html and not css and not js:
+        html = raw_text.strip()
+    return {'html': html, 'css': css, 'js': js}
+
+
+def legacy_llm_parse_code(raw_text):
+    html_match = re.search(r'```html\s*(.*?)```', raw_text, re.DOTALL)
+    css_match = re.search(r'```css\s*(.*?)```', raw_text, re.DOTALL)
+    js_match = re.search(r'```(?:javascript|js)\s*(.*?)```', raw_text, re.DOTALL)
+    return {
+        'html': html_match.group(1).strip() if html_match else raw_text.strip(),
+        'css': css_match.group(1).strip() if css_match else '',
+        'js': js_match.group(1).strip() if js_match else '',
+    }
+
+
+def legacy_label_parse(text):
+    html = re.search(r'HTML:(.*?)(?:CSS:|$)', text, re.DOTALL)
+    css = re.search(r'CSS:(.*?)(?:JS:|$)', text, re.DOTALL)
+    js = re.search(r'JS:(.*?)$', text, re.DOTALL)
+    return {
+        'html': html.group(1).strip() if html else '',
+        'css': css.group(1).strip() if css else '',
+        'js': js.group(1).strip() if js else '',
+    }
+
+
+# ── Inputs ────────────────────────────────────────────────────────────────────
+
+def make_fenced(size_kb):
+    html = '<div class="card"><h3>Title</h3><p>Some text</p></div>\n' * (size_kb * 10)
+    css = '.card{padding:1rem;border-radius:8px}\n' * (size_kb * 8)
+    js = "document.querySelectorAll('.card').forEach(c => c.classList.add('x'));\n" * (size_kb * 4)
+    return f"```html\n{html}```\n\n```css\n{css}```\n\n```javascript\n{js}```\n"
+
+
+def make_truncated(size_kb):
+    # No closing fence and no js block: the legacy patterns scan to the end repeatedly
+    return make_fenced(size_kb).rsplit('```javascript', 1)[0] + '```css\n' + '.x{color:red}\n' * (size_kb * 20)
+
+
+def make_labeled(size_kb):
+    html = '<section><h2>Heading</h2><p>Body copy</p></section>\n' * (size_kb * 10)
+    css = 'section{margin:0 auto;max-width:960px}\n' * (size_kb * 8)
+    js = "console.log('ready');\n" * (size_kb * 4)
+    return f"HTML:\n{html}\nCSS:\n{css}\nJS:\n{js}"
+
+
+def bench(label, fn, text, runs):
+    seconds = min(timeit.repeat(lambda: fn(text), number=runs, repeat=3)) / runs
+    print(f"  {label:<32}{seconds * 1000:10.3f} ms")
+
+
+def main():
+    size_kb = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    cases = [
+        ('fenced', make_fenced(size_kb), [
+            ('legacy parse_generated_code', legacy_parse_generated_code),
+            ('legacy LLMService._parse_code', legacy_llm_parse_code),
+        ]),
+        ('truncated', make_truncated(size_kb), [
+            ('legacy parse_generated_code', legacy_parse_generated_code),
+            ('legacy LLMService._parse_code', legacy_llm_parse_code),
+        ]),
+        ('labeled', make_labeled(size_kb), [
+            ('legacy CodeParser (3 scans)', legacy_label_parse),
+        ]),
+    ]
+
+    for name, text, legacy in cases:
+        print(f"{name}: {len(text) / 1024:.0f} KB")
+        for label, fn in legacy:
+            bench(label, fn, text, runs)
+        bench('scan_code_blocks', scan_code_blocks, text, runs)
+        bench('parse_generated_code', parse_generated_code, text, runs)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Measure prefill time with and without the shared-prefix KV-cache.
+
+Usage: python benchmarks/bench_prefill.py [model_id_or_path] [batch_size] [runs]
+Generating a single new token makes each run dominated by prefill.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from ai_engine.llama_generator import LlamaWebGenerator
+
+PROMPTS = [
+    "portfolio website for a wedding photographer",
+    "landing page for a coffee subscription startup",
+    "dark themed blog about machine learning",
+    "online store for handmade ceramics",
+    "restaurant site with menu and reservations",
+    "personal resume site for a data engineer",
+    "landing page for a fitness app",
+    "agency homepage for a design studio",
+]
+
+
+def bench(generator, prefix, suffixes, reuse_prefix, runs):
+    import torch
+
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        inputs = generator.prepare_inputs(prefix, suffixes, reuse_prefix=reuse_prefix)
+        with torch.no_grad():
+            generator.model.generate(
+                **inputs, max_new_tokens=1, do_sample=False, pad_token_id=generator.tokenizer.pad_token_id
+            )
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def main():
+    model = sys.argv[1] if len(sys.argv) > 1 else None
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    runs = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+
+    generator = LlamaWebGenerator(model_name=model)
+    prefix, _ = generator.build_prompt("", "full website")
+    suffixes = [generator.build_prompt(p, "full website")[1] for p in PROMPTS[:batch_size]]
+
+    prefix_tokens = len(generator.tokenizer(prefix)["input_ids"])
+    print(f"model={generator.model_name} device={generator.device} batch={batch_size} prefix_tokens={prefix_tokens}")
+
+    # Warm both paths (and the prefix cache) before timing
+    bench(generator, prefix, suffixes, reuse_prefix=False, runs=1)
+    bench(generator, prefix, suffixes, reuse_prefix=True, runs=1)
+
+    full = bench(generator, prefix, suffixes, reuse_prefix=False, runs=runs)
+    cached = bench(generator, prefix, suffixes, reuse_prefix=True, runs=runs)
+    print(f"full prefill:   {full * 1000:8.2f} ms")
+    print(f"cached prefix:  {cached * 1000:8.2f} ms")
+    print(f"speedup:        {full / cached:8.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,4 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import scoped_session, selectinload
 import os
 import sys
 
@@ -9,47 +8,69 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from models import Project, GeneratedWebsite, SessionLocal
 
 class DatabaseManager:
-    def __init__(self):
-        # Use existing SessionLocal from models.py which uses environment variables
-        self.session = SessionLocal()
-    
+    def __init__(self, session_factory=SessionLocal):
+        # One session per thread, i.e. per request under a threaded server;
+        # call remove() when the request is done (see app.py teardown)
+        self.Session = scoped_session(session_factory)
+
+    @property
+    def session(self):
+        return self.Session()
+
+    def remove(self):
+        """Close the current thread's session and return its connection to the pool."""
+        self.Session.remove()
+
+    @staticmethod
+    def _build_project(prompt, code):
+        project = Project(
+            project_name="Generated Project", # Placeholder name or extract from prompt
+            prompt=prompt,
+            user_id=None # Assuming no auth for now
+        )
+        # Inserted together with the project in the same flush
+        project.generated_websites.append(GeneratedWebsite(
+            html_code=code.get('html_code', ''),
+            css_code=code.get('css_code', ''),
+            js_code=code.get('js_code', ''),
+            metadata_=code.get('metadata', {})
+        ))
+        return project
+
     def save_project(self, prompt, code):
         """
         Save parsing results to database.
-        code is expected to be a dict with 'html', 'css', 'js'.
+        code is expected to be a dict with 'html_code', 'css_code', 'js_code'.
         """
+        return self.save_projects([(prompt, code)])[0]
+
+    def save_projects(self, items):
+        """
+        Save many (prompt, code) pairs in one transaction and return their project ids.
+        Rows of each table are sent as batched multi-row INSERT ... RETURNING statements.
+        """
+        session = self.session
         try:
-            # Create Project entry
-            project = Project(
-                project_name="Generated Project", # Placeholder name or extract from prompt
-                prompt=prompt,
-                user_id=None # Assuming no auth for now
-            )
-            self.session.add(project)
-            self.session.commit()
-            
-            # Create GeneratedWebsite entry
-            website = GeneratedWebsite(
-                project_id=project.id,
-                html_code=code.get('html_code', ''),
-                css_code=code.get('css_code', ''),
-                js_code=code.get('js_code', ''),
-                metadata_=code.get('metadata', {})
-            )
-            self.session.add(website)
-            self.session.commit()
-            
-            return project.id
-        except Exception as e:
-            self.session.rollback()
-            raise e
-    
+            projects = [self._build_project(prompt, code) for prompt, code in items]
+            session.add_all(projects)
+            session.flush()
+            # Read ids before commit expires the instances
+            project_ids = [project.id for project in projects]
+            session.commit()
+            return project_ids
+        except Exception:
+            session.rollback()
+            raise
+
     def get_project(self, project_id):
         """Retrieve project by ID."""
-        project = self.session.query(Project).filter(Project.id == project_id).first()
+        websites = selectinload(Project.generated_websites)
+        project = (
+            self.session.query(Project)
+            .options(websites, *GeneratedWebsite.code_load_options(parent=websites))
+            .filter(Project.id == project_id)
+            .first()
+        )
         if project:
             return project.to_dict(include_websites=True)
         return None
-    
-    def __del__(self):
-        self.session.close()
@@ -0,0 +1,47 @@
+"""
+Delete code_blobs no stored website can reach any more.
+
+Blobs are shared between websites (and delta blobs build on their base), so
+deleting a project or website never deletes blobs; run this periodically
+instead. A blob is kept if a website references it, if it was created in
+the last ``grace_seconds`` (it may belong to a generation still being saved),
+or if a kept blob is a delta on top of it.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from models import engine
+
+GRACE_SECONDS = 3600
+
+# Works on Postgres and SQLite; deltas are deleted in the same statement as their bases
+DELETE_UNREACHABLE = text("""
+DELETE FROM code_blobs WHERE hash NOT IN (
+    WITH RECURSIVE kept(hash) AS (
+        SELECT html_hash FROM generated_websites WHERE html_hash IS NOT NULL
+        UNION SELECT css_hash FROM generated_websites WHERE css_hash IS NOT NULL
+        UNION SELECT js_hash FROM generated_websites WHERE js_hash IS NOT NULL
+        UNION SELECT hash FROM code_blobs WHERE created_at >= :cutoff OR created_at IS NULL
+        UNION SELECT code_blobs.base_hash FROM code_blobs JOIN kept ON code_blobs.hash = kept.hash
+            WHERE code_blobs.base_hash IS NOT NULL
+    )
+    SELECT hash FROM kept
+)
+""")
+
+def collect(grace_seconds=GRACE_SECONDS):
+    """Delete unreachable blobs; returns how many were removed."""
+    cutoff = datetime.utcnow() - timedelta(seconds=grace_seconds)
+    with engine.begin() as connection:
+        deleted = connection.execute(DELETE_UNREACHABLE, {'cutoff': cutoff}).rowcount
+    print(f"✓ Deleted {deleted} unreachable code blobs.")
+    return deleted
+
+
+if __name__ == '__main__':
+    collect()
@@ -0,0 +1,83 @@
+"""Move inline html/css/js code of existing generated websites into code_blobs."""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import inspect, or_, text
+
+from models import SessionLocal, Base, engine, GeneratedWebsite, CodeBlob
+
+BATCH_SIZE = 500
+
+# Columns added to tables that may predate them; create_all() never alters
+# existing tables and schema.sql's ADD COLUMN IF NOT EXISTS is Postgres-only
+ADDED_COLUMNS = {
+    GeneratedWebsite.__table__: (
+        'html_hash', 'css_hash', 'js_hash', 'cache_key', 'preview_etag', 'preview_gzip', 'preview_br',
+    ),
+    CodeBlob.__table__: ('base_hash', 'depth'),
+}
+
+
+def _column_ddl(column, dialect):
+    ddl = f"{column.name} {column.type.compile(dialect=dialect)}"
+    for foreign_key in column.foreign_keys:
+        ddl += f" REFERENCES {foreign_key.column.table.name}({foreign_key.column.name})"
+    if not column.nullable:
+        # Existing rows need a value; NOT NULL columns here all have a scalar default
+        ddl += f" NOT NULL DEFAULT {column.default.arg!r}"
+    return ddl
+
+
+def add_missing_columns(bind=engine):
+    """Add the columns (and indexes) of ADDED_COLUMNS missing from existing tables."""
+    inspector = inspect(bind)
+    with bind.begin() as connection:
+        for table, columns in ADDED_COLUMNS.items():
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for name in columns:
+                if name not in existing:
+                    connection.execute(text(
+                        f"ALTER TABLE {table.name} ADD COLUMN {_column_ddl(table.c[name], bind.dialect)}"
+                    ))
+                    print(f"  added {table.name}.{name}")
+            for index in table.indexes:
+                index.create(bind=connection, checkfirst=True)
+
+
+def migrate(batch_size=BATCH_SIZE):
+    """Rewrite legacy rows batch by batch; safe to re-run and to interrupt."""
+    Base.metadata.create_all(bind=engine)
+    add_missing_columns()
+    db = SessionLocal()
+    migrated = 0
+    try:
+        while True:
+            websites = (
+                db.query(GeneratedWebsite)
+                .options(*GeneratedWebsite.code_load_options())
+                .filter(or_(
+                    GeneratedWebsite.html_code_legacy.isnot(None),
+                    GeneratedWebsite.css_code_legacy.isnot(None),
+                    GeneratedWebsite.js_code_legacy.isnot(None),
+                ))
+                .order_by(GeneratedWebsite.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not websites:
+                break
+            for website in websites:
+                # Re-assigning through the accessors stores blobs and clears the inline columns
+                for field in GeneratedWebsite.CODE_FIELDS:
+                    setattr(website, f'{field}_code', getattr(website, f'{field}_code'))
+            db.commit()
+            migrated += len(websites)
+            print(f"  migrated {migrated} websites...")
+        print(f"✓ Migrated {migrated} websites to blob storage.")
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    migrate()
@@ -16,6 +16,18 @@ CREATE TABLE IF NOT EXISTS projects (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Compressed, content-addressed code shared across generated websites;
+-- rows with a base_hash hold a line delta against that blob
+CREATE TABLE IF NOT EXISTS code_blobs (
+    hash VARCHAR(64) PRIMARY KEY,
+    codec VARCHAR(16) NOT NULL,
+    size INTEGER NOT NULL,
+    data BYTEA NOT NULL,
+    base_hash VARCHAR(64) REFERENCES code_blobs(hash),
+    depth INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Generated websites table
 CREATE TABLE IF NOT EXISTS generated_websites (
     id SERIAL PRIMARY KEY,
@@ -23,10 +35,28 @@ CREATE TABLE IF NOT EXISTS generated_websites (
     html_code TEXT,
     css_code TEXT,
     js_code TEXT,
+    html_hash VARCHAR(64) REFERENCES code_blobs(hash),
+    css_hash VARCHAR(64) REFERENCES code_blobs(hash),
+    js_hash VARCHAR(64) REFERENCES code_blobs(hash),
     metadata JSONB DEFAULT '{}',
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    cache_key VARCHAR(64),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    preview_etag VARCHAR(64),
+    preview_gzip BYTEA,
+    preview_br BYTEA
 );
 
+-- Columns added after the initial release, for existing databases
+ALTER TABLE generated_websites ADD COLUMN IF NOT EXISTS cache_key VARCHAR(64);
+ALTER TABLE generated_websites ADD COLUMN IF NOT EXISTS preview_etag VARCHAR(64);
+ALTER TABLE generated_websites ADD COLUMN IF NOT EXISTS preview_gzip BYTEA;
+ALTER TABLE generated_websites ADD COLUMN IF NOT EXISTS preview_br BYTEA;
+ALTER TABLE generated_websites ADD COLUMN IF NOT EXISTS html_hash VARCHAR(64) REFERENCES code_blobs(hash);
+ALTER TABLE generated_websites ADD COLUMN IF NOT EXISTS css_hash VARCHAR(64) REFERENCES code_blobs(hash);
+ALTER TABLE generated_websites ADD COLUMN IF NOT EXISTS js_hash VARCHAR(64) REFERENCES code_blobs(hash);
+ALTER TABLE code_blobs ADD COLUMN IF NOT EXISTS base_hash VARCHAR(64) REFERENCES code_blobs(hash);
+ALTER TABLE code_blobs ADD COLUMN IF NOT EXISTS depth INTEGER NOT NULL DEFAULT 0;
+
 -- Templates table
 CREATE TABLE IF NOT EXISTS templates (
     id SERIAL PRIMARY KEY,
@@ -37,7 +67,22 @@ CREATE TABLE IF NOT EXISTS templates (
     js_template TEXT
 );
 
+-- Background generation jobs
+CREATE TABLE IF NOT EXISTS generation_jobs (
+    id VARCHAR(32) PRIMARY KEY,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    request JSONB DEFAULT '{}',
+    result JSONB,
+    error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
 -- Indexes for common queries
 CREATE INDEX IF NOT EXISTS idx_projects_user_id ON projects(user_id);
+CREATE INDEX IF NOT EXISTS idx_projects_created_at_id ON projects(created_at DESC, id DESC);
 CREATE INDEX IF NOT EXISTS idx_generated_websites_project_id ON generated_websites(project_id);
+CREATE INDEX IF NOT EXISTS idx_generated_websites_cache_key ON generated_websites(cache_key);
 CREATE INDEX IF NOT EXISTS idx_templates_category ON templates(category);
+CREATE INDEX IF NOT EXISTS idx_generation_jobs_status ON generation_jobs(status);
@@ -1,11 +1,141 @@
+import hashlib
+import threading
+import time
+import zlib
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, create_engine
-from sqlalchemy.orm import relationship, declarative_base, sessionmaker
+from sqlalchemy import (
+    Column, Integer, String, Text, DateTime, ForeignKey, JSON, LargeBinary, Index, create_engine, event,
+)
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool, StaticPool
+from sqlalchemy.orm import (
+    relationship, declarative_base, sessionmaker, deferred, undefer, load_only, selectinload, Session,
+)
 from config import settings
+from services.code_delta import make_delta, apply_delta
+from services.lru_cache import LRUCache
+
+try:
+    import zstandard
+except ImportError:  # Optional: blobs are zlib-compressed without it
+    zstandard = None
 
 Base = declarative_base()
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool that records how long checkouts wait for a free connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._wait_lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            with self._wait_lock:
+                self.checkouts += 1
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+
+
+def _engine_options(url):
+    """create_engine() keyword arguments for the configured database."""
+    if url.get_backend_name() == 'sqlite':
+        options = {'connect_args': {'check_same_thread': False, 'timeout': settings.DB_SQLITE_BUSY_TIMEOUT}}
+        if url.database in (None, '', ':memory:'):
+            # Every session must see the same in-memory database
+            options['poolclass'] = StaticPool
+        else:
+            options.update(poolclass=MeteredQueuePool, pool_size=settings.DB_POOL_SIZE, max_overflow=settings.DB_MAX_OVERFLOW)
+        return options
+
+    options = {
+        'poolclass': MeteredQueuePool,
+        'pool_size': settings.DB_POOL_SIZE,
+        'max_overflow': settings.DB_MAX_OVERFLOW,
+        'pool_timeout': settings.DB_POOL_TIMEOUT,
+        'pool_recycle': settings.DB_POOL_RECYCLE,
+        'pool_pre_ping': settings.DB_POOL_PRE_PING,
+    }
+    if settings.DB_STATEMENT_TIMEOUT_MS and url.get_backend_name() == 'postgresql':
+        options['connect_args'] = {'options': f'-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}'}
+    return options
+
+
+def _configure_sqlite(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    if settings.DB_SQLITE_WAL:
+        # WAL lets readers proceed while a writer commits
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA foreign_keys=ON')
+    cursor.close()
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """Create the engine from settings on first use and return it."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                url = make_url(settings.DATABASE_URL)
+                engine = create_engine(url, **_engine_options(url))
+                if url.get_backend_name() == 'sqlite':
+                    event.listen(engine, 'connect', _configure_sqlite)
+                _engine = engine
+    return _engine
+
+
+def pool_stats():
+    """Connection pool gauges plus checkout wait times (seconds)."""
+    pool = get_engine().pool
+    stats = {'pool': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+        )
+    if isinstance(pool, MeteredQueuePool):
+        with pool._wait_lock:
+            stats.update(
+                checkouts=pool.checkouts,
+                wait_total=round(pool.wait_total, 6),
+                wait_avg=round(pool.wait_total / pool.checkouts, 6) if pool.checkouts else 0.0,
+                wait_max=round(pool.wait_max, 6),
+            )
+    return stats
+
+
+def __getattr__(name):
+    # `from models import engine` keeps working without connecting at import time
+    if name == 'engine':
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class _LazySessionMaker(sessionmaker):
+    """sessionmaker that binds to the engine when the first session is created."""
+
+    def __call__(self, **local_kw):
+        if self.kw.get('bind') is None:
+            self.configure(bind=get_engine())
+        return super().__call__(**local_kw)
+
+
+SessionLocal = _LazySessionMaker(autocommit=False, autoflush=False)
 
 
 def get_db():
@@ -43,6 +173,9 @@ class Project(Base):
     prompt = Column(Text, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # Keyset pagination of the project list (newest first); same name as in schema.sql
+    __table_args__ = (Index('idx_projects_created_at_id', created_at.desc(), id.desc()),)
+
     user = relationship('User', back_populates='projects')
     generated_websites = relationship(
         'GeneratedWebsite', back_populates='project', cascade='all, delete-orphan'
@@ -61,18 +194,153 @@ class Project(Base):
         return data
 
 
+class CodeBlob(Base):
+    """
+    Content-addressed, compressed code text shared by every website that uses it.
+
+    A blob is either a full snapshot or, when base_hash is set, a line delta
+    against the previous version of the same file; depth counts the deltas
+    between it and the nearest snapshot.
+    """
+    __tablename__ = 'code_blobs'
+
+    hash = Column(String(64), primary_key=True)
+    codec = Column(String(16), nullable=False)
+    size = Column(Integer, nullable=False)
+    data = deferred(Column(LargeBinary, nullable=False))
+    base_hash = Column(String(64), ForeignKey('code_blobs.hash'))
+    depth = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    base = relationship('CodeBlob', remote_side=[hash])
+
+    @staticmethod
+    def hash_text(text):
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _compress(raw):
+        if zstandard is not None:
+            return 'zstd', zstandard.ZstdCompressor(level=19).compress(raw)
+        return 'zlib', zlib.compress(raw, 9)
+
+    @classmethod
+    def from_text(cls, text, base=None):
+        """
+        Build a blob for text, as a delta against base (the previous version)
+        when that is much smaller than a snapshot and the chain is not too long.
+        """
+        codec, data = cls._compress(text.encode('utf-8'))
+        blob = cls(hash=cls.hash_text(text), codec=codec, size=len(text), data=data, depth=0)
+        if base is not None and base.depth + 1 < settings.CODE_SNAPSHOT_INTERVAL:
+            codec, delta = cls._compress(make_delta(base.text, text).encode('utf-8'))
+            if len(delta) < len(data) * settings.CODE_DELTA_MAX_RATIO:
+                blob.codec, blob.data = codec, delta
+                blob.base, blob.depth = base, base.depth + 1
+        blob.__dict__['_text'] = text
+        return blob
+
+    @property
+    def text(self):
+        """Decompressed (and, for deltas, reconstructed) text."""
+        cached = self.__dict__.get('_text')
+        if cached is None:
+            cached = _blob_text_cache.get(self.hash)
+        if cached is None:
+            if self.codec == 'zstd':
+                raw = zstandard.ZstdDecompressor().decompress(self.data)
+            elif self.codec == 'zlib':
+                raw = zlib.decompress(self.data)
+            else:
+                raw = self.data
+            cached = raw.decode('utf-8')
+            if self.base_hash is not None:
+                cached = apply_delta(self.base.text, cached)
+            _blob_text_cache.put(self.hash, cached, size=len(cached))
+        self.__dict__['_text'] = cached
+        return cached
+
+
+# Reconstructed blob text by hash; blobs are immutable, so entries never go stale
+_blob_text_cache = LRUCache(max_entries=4096, max_bytes=settings.CODE_TEXT_CACHE_MAX_BYTES, ttl=None)
+
+
+def _code_accessor(field):
+    """
+    Text accessor for one code field. Reads come from the referenced
+    CodeBlob, or the legacy inline column for rows not yet migrated;
+    writes are staged and turned into (deduplicated) blobs at flush time.
+    """
+    hash_attr, blob_attr, legacy_attr = f'{field}_hash', f'{field}_blob', f'{field}_code_legacy'
+
+    def getter(self):
+        staged = self.__dict__.get('_staged_code')
+        if staged and field in staged:
+            return staged[field]
+        if getattr(self, hash_attr) is not None:
+            return getattr(self, blob_attr).text
+        return getattr(self, legacy_attr)
+
+    def setter(self, text):
+        self.__dict__.setdefault('_staged_code', {})[field] = text
+        self.__dict__.setdefault('_unflushed_code', set()).add(field)
+        setattr(self, legacy_attr, None)
+        if text is None:
+            setattr(self, blob_attr, None)
+
+    return property(getter, setter)
+
+
 class GeneratedWebsite(Base):
     __tablename__ = 'generated_websites'
+    # Same name as in schema.sql; the exact cache's persistent tier looks rows up by key
+    __table_args__ = (Index('idx_generated_websites_cache_key', 'cache_key'),)
+
+    CODE_FIELDS = ('html', 'css', 'js')
 
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey('projects.id'), nullable=False)
-    html_code = Column(Text)
-    css_code = Column(Text)
-    js_code = Column(Text)
+    # Inline code from before blob storage; see database/migrate_code_blobs.py
+    html_code_legacy = deferred(Column('html_code', Text))
+    css_code_legacy = deferred(Column('css_code', Text))
+    js_code_legacy = deferred(Column('js_code', Text))
+    html_hash = Column(String(64), ForeignKey('code_blobs.hash'))
+    css_hash = Column(String(64), ForeignKey('code_blobs.hash'))
+    js_hash = Column(String(64), ForeignKey('code_blobs.hash'))
     metadata_ = Column('metadata', JSON, default={})
+    cache_key = Column(String(64))
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # Assembled preview: content hash plus pre-compressed bodies, filled on first request
+    preview_etag = Column(String(64))
+    preview_gzip = deferred(Column(LargeBinary))
+    preview_br = deferred(Column(LargeBinary))
+
     project = relationship('Project', back_populates='generated_websites')
+    html_blob = relationship('CodeBlob', foreign_keys=[html_hash])
+    css_blob = relationship('CodeBlob', foreign_keys=[css_hash])
+    js_blob = relationship('CodeBlob', foreign_keys=[js_hash])
+
+    html_code = _code_accessor('html')
+    css_code = _code_accessor('css')
+    js_code = _code_accessor('js')
+
+    @classmethod
+    def code_load_options(cls, parent=None):
+        """
+        Loader options that fetch the code of many websites in a constant
+        number of queries; pass e.g. selectinload(Project.generated_websites)
+        as parent when loading websites through a relationship.
+        """
+        options = []
+        for field in cls.CODE_FIELDS:
+            blob = getattr(cls, f'{field}_blob')
+            legacy = getattr(cls, f'{field}_code_legacy')
+            if parent is None:
+                options += [selectinload(blob).undefer(CodeBlob.data), undefer(legacy)]
+            else:
+                options += [parent.selectinload(blob).undefer(CodeBlob.data), parent.undefer(legacy)]
+        return options
 
     def to_dict(self):
         return {
@@ -86,6 +354,75 @@ class GeneratedWebsite(Base):
         }
 
 
+@event.listens_for(Session, 'before_flush')
+def _store_staged_code(session, flush_context, instances):
+    """
+    Point websites with newly set code at existing blobs, inserting only the
+    missing ones; new blobs are stored as deltas against the same file of
+    the project's previous version where possible.
+    """
+    staged = []
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, GeneratedWebsite) and obj.__dict__.get('_unflushed_code'):
+            for field in obj.__dict__.pop('_unflushed_code'):
+                text = obj.__dict__['_staged_code'][field]
+                if text is not None:
+                    staged.append((obj, field, text, CodeBlob.hash_text(text)))
+    if not staged:
+        return
+
+    hashes = {digest for _, _, _, digest in staged}
+    blobs = {
+        blob.hash: blob
+        for blob in session.query(CodeBlob).options(load_only(CodeBlob.hash)).filter(CodeBlob.hash.in_(hashes))
+    }
+    for obj, field, text, digest in staged:
+        if digest not in blobs:
+            base = _previous_blob(session, obj, field)
+            blobs[digest] = CodeBlob.from_text(text, base=base)
+            session.add(blobs[digest])
+        setattr(obj, f'{field}_blob', blobs[digest])
+
+
+def _previous_blob(session, website, field):
+    """The blob holding this file in the latest earlier version of the website's project."""
+    if website.project_id is None:
+        return None
+    hash_column = getattr(GeneratedWebsite, f'{field}_hash')
+    query = session.query(hash_column).filter(
+        GeneratedWebsite.project_id == website.project_id, hash_column.isnot(None)
+    )
+    if website.id is not None:
+        query = query.filter(GeneratedWebsite.id < website.id)
+    row = query.order_by(GeneratedWebsite.id.desc()).first()
+    return session.get(CodeBlob, row[0]) if row else None
+
+
+class GenerationJob(Base):
+    __tablename__ = 'generation_jobs'
+
+    id = Column(String(32), primary_key=True)
+    status = Column(String(20), nullable=False, default='queued')
+    request = Column(JSON, default={})
+    result = Column(JSON)
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'request': self.request,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
 class Template(Base):
     __tablename__ = 'templates'
 
@@ -1,58 +1,149 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from pydantic import BaseModel
-from sqlalchemy.orm import Session
+import asyncio
+import base64
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from sqlalchemy import and_, or_, func
+from sqlalchemy.orm import Session, undefer, selectinload, aliased
 from typing import Optional
 
-from models import get_db, Project, GeneratedWebsite, Template
+from config import settings
+from models import get_db, pool_stats, SessionLocal, Project, GeneratedWebsite, CodeBlob
 from services.llm_service import llm_service
-from services.code_parser import combine_code
+from services.generation_cache import generation_cache
+from services.semantic_cache import semantic_cache
+from services.job_queue import job_queue, JobQueueFull
+from services.code_parser import IncrementalCodeParser
+from services.code_delta import unified_diff
+from services.preview_cache import preview_cache, build_preview_artifacts
+from services.template_registry import template_registry
+from services.prompt_budget import PromptTooLong
 
 router = APIRouter()
 
 
+async def _recover_jobs():
+    try:
+        failed = await run_in_threadpool(job_queue.recover)
+    except Exception as e:
+        print(f"Could not recover interrupted jobs: {e}")
+        return
+    if failed:
+        print(f"Marked {failed} interrupted generation jobs as failed")
+
+
+async def _close_llm_clients():
+    await llm_service.aclose()
+
+
+# Included routers' startup/shutdown handlers run with the application's
+router.add_event_handler('startup', _recover_jobs)
+router.add_event_handler('shutdown', _close_llm_clients)
+
+
 # ── Request / Response Schemas ────────────────────────────────────────────────
 
 class GenerateRequest(BaseModel):
     prompt: str
     project_name: Optional[str] = None
     template_id: Optional[int] = None
+    # Regenerate into an existing project as its next version
+    project_id: Optional[int] = None
+
+
+class ComposeRequest(BaseModel):
+    prompt: str
+    project_name: Optional[str] = None
+    project_id: Optional[int] = None
+    # Let the LLM rewrite the template copy for the prompt (structure is kept)
+    rewrite_copy: bool = False
+
+
+class BatchItem(BaseModel):
+    prompt: str
+    project_name: Optional[str] = None
+    template_id: Optional[int] = None
+
+
+class BatchGenerateRequest(BaseModel):
+    items: list[BatchItem] = Field(min_length=1, max_length=settings.BATCH_MAX_ITEMS)
+    concurrency: Optional[int] = Field(None, ge=1, le=settings.BATCH_MAX_CONCURRENCY)
 
 
 # ── Generate Website ──────────────────────────────────────────────────────────
 
-@router.post('/generate', status_code=201)
-def generate_website(body: GenerateRequest, db: Session = Depends(get_db)):
-    """Accept a prompt and return generated HTML/CSS/JS."""
-    project_name = body.project_name or body.prompt[:60]
+def _get_template_data(template_id):
+    """Look up a base template as a dict, or None if not requested/found."""
+    if not template_id:
+        return None
+    # Served from memory; the registry's first load and TTL reloads query the
+    # database, so async routes call this in the threadpool
+    return template_registry.get(template_id)
 
-    # Optionally use a base template
-    template_data = None
-    if body.template_id:
-        template = db.query(Template).get(body.template_id)
-        if template:
-            template_data = template.to_dict()
 
-    # Generate code with LLM
-    result = llm_service.generate_website(body.prompt, template=template_data)
+def _website_metadata(prompt, template_id, result):
+    """Metadata stored with a generated website."""
+    metadata = {'prompt': prompt, 'template_id': template_id}
+    # Composed sites list their section templates; LLM output reports its token split
+    for key in ('sections', 'usage'):
+        if result.get(key):
+            metadata[key] = result[key]
+    return metadata
 
-    # Persist to database
-    project = Project(project_name=project_name, prompt=body.prompt)
-    db.add(project)
-    db.flush()
+
+def _save_generation(db, body, result):
+    """Persist a generated website and its project (new, or body.project_id); return both rows."""
+    if body.project_id:
+        project = db.query(Project).get(body.project_id)
+        if not project:
+            raise HTTPException(status_code=404, detail="Project not found")
+    else:
+        project = Project(project_name=body.project_name or body.prompt[:60], prompt=body.prompt)
+        db.add(project)
+        db.flush()
+
+    metadata = _website_metadata(body.prompt, getattr(body, 'template_id', None), result)
 
     website = GeneratedWebsite(
         project_id=project.id,
         html_code=result['html'],
         css_code=result['css'],
         js_code=result['js'],
-        metadata_={'prompt': body.prompt, 'template_id': body.template_id},
+        metadata_=metadata,
+        cache_key=result.get('cache_key'),
     )
     db.add(website)
     db.commit()
     db.refresh(project)
     db.refresh(website)
 
-    preview_html = combine_code(result['html'], result['css'], result['js'])
+    # Only LLM output carries a cache key; index it for near-duplicate prompts
+    if website.cache_key:
+        semantic_cache.add(body.prompt, website.id, metadata['template_id'])
+    return project, website
+
+
+@router.post('/generate', status_code=201)
+async def generate_website(body: GenerateRequest, db: Session = Depends(get_db)):
+    """Accept a prompt and return generated HTML/CSS/JS."""
+    # Optionally use a base template
+    template_data = await run_in_threadpool(_get_template_data, body.template_id)
+
+    # Generate code with LLM
+    try:
+        result = await llm_service.agenerate_website(body.prompt, template=template_data, db=db)
+    except PromptTooLong as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    # Persist to database
+    project, website = await run_in_threadpool(_save_generation, db, body, result)
+
+    preview_html = preview_cache.get(website)
 
     return {
         'project': project.to_dict(),
@@ -61,51 +152,608 @@ def generate_website(body: GenerateRequest, db: Session = Depends(get_db)):
     }
 
 
+@router.post('/generate/compose', status_code=201)
+def compose_website(body: ComposeRequest, db: Session = Depends(get_db)):
+    """
+    Build a site from the component template library (navbar, hero, ...,
+    footer picked to match the prompt) without running generation; the
+    chosen template ids are recorded in the website metadata.
+    """
+    result = llm_service.compose_website(body.prompt, title=body.project_name, rewrite_copy=body.rewrite_copy)
+    project, website = _save_generation(db, body, result)
+    return {
+        'project': project.to_dict(),
+        'website': website.to_dict(),
+        'preview_html': preview_cache.get(website),
+    }
+
+
+def _save_streamed_generation(body, result):
+    """Persist a streamed generation in its own session and build the final event."""
+    # The request-scoped session may be closed once streaming starts
+    db = SessionLocal()
+    try:
+        project, website = _save_generation(db, body, result)
+        return {
+            'type': 'complete',
+            'project': project.to_dict(),
+            'website': website.to_dict(),
+            'preview_html': preview_cache.get(website),
+        }
+    finally:
+        db.close()
+
+
+def _ndjson(event):
+    return json.dumps(event) + '\n'
+
+
+@router.post('/generate/stream')
+async def generate_website_stream(body: GenerateRequest):
+    """
+    Stream generation progress as NDJSON events.
+
+    Emits ``delta`` events with partial html/css/js as soon as each fenced
+    block opens, then a final ``complete`` event shaped like POST /generate.
+    """
+    template_data = await run_in_threadpool(_get_template_data, body.template_id)
+
+    async def event_stream():
+        yield _ndjson({'type': 'start'})
+
+        parser = IncrementalCodeParser()
+        try:
+            async for chunk in llm_service.astream_website(body.prompt, template=template_data):
+                for language, delta in parser.feed(chunk):
+                    yield _ndjson({'type': 'delta', 'language': language, 'content': delta})
+            for language, delta in parser.close():
+                yield _ndjson({'type': 'delta', 'language': language, 'content': delta})
+
+            result = parser.result()
+
+            complete = await run_in_threadpool(_save_streamed_generation, body, result)
+            yield _ndjson(complete)
+        except Exception as e:
+            print(f"Error streaming website: {e}")
+            yield _ndjson({'type': 'error', 'detail': str(e)})
+
+    return StreamingResponse(event_stream(), media_type='application/x-ndjson')
+
+
+# ── Batch Generation ──────────────────────────────────────────────────────────
+
+def _generate_batch_item(item):
+    """Executor worker: generate one batch item with its own session for cache lookups."""
+    db = SessionLocal()
+    try:
+        template_data = _get_template_data(item.template_id)
+        return llm_service.generate_website(item.prompt, template=template_data, db=db)
+    finally:
+        db.close()
+
+
+def _save_batch(generated):
+    """
+    Persist (index, item, result) triples in one transaction; projects and
+    websites are each written with batched multi-row INSERTs.
+    """
+    db = SessionLocal()
+    try:
+        projects = []
+        for _, item, result in generated:
+            project = Project(project_name=item.project_name or item.prompt[:60], prompt=item.prompt)
+            project.generated_websites.append(GeneratedWebsite(
+                html_code=result['html'],
+                css_code=result['css'],
+                js_code=result['js'],
+                metadata_=_website_metadata(item.prompt, item.template_id, result),
+                cache_key=result.get('cache_key'),
+            ))
+            projects.append(project)
+        db.add_all(projects)
+        db.flush()
+
+        events = []
+        for (index, _, _), project in zip(generated, projects):
+            events.append({
+                'type': 'item',
+                'index': index,
+                'project': project.to_dict(),
+                'website': project.generated_websites[0].to_dict(),
+            })
+        db.commit()
+
+        # Index only websites whose rows were committed
+        for (_, item, _), project in zip(generated, projects):
+            website = project.generated_websites[0]
+            if website.cache_key:
+                semantic_cache.add(item.prompt, website.id, item.template_id)
+        return events
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+@router.post('/generate/batch')
+async def generate_website_batch(body: BatchGenerateRequest):
+    """
+    Generate one website per item, streaming NDJSON results as they complete.
+
+    Items run on a bounded thread pool (``concurrency``, default
+    BATCH_CONCURRENCY). Items finishing within BATCH_FLUSH_MS of each other
+    (up to BATCH_FLUSH_ITEMS) are saved with one bulk insert and reported as ``item`` events (with ``index`` into the request);
+    failures are reported as ``error`` events without stopping the batch. A
+    final ``complete`` event carries the totals.
+    """
+    concurrency = body.concurrency or settings.BATCH_CONCURRENCY
+
+    async def event_stream():
+        yield _ndjson({'type': 'start', 'total': len(body.items)})
+
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='batch-generate')
+        pending = {
+            loop.run_in_executor(executor, _generate_batch_item, item): index
+            for index, item in enumerate(body.items)
+        }
+        succeeded = failed = 0
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # Items rarely finish together; gather more for a short window
+                # so each save is a real multi-row insert
+                deadline = loop.time() + settings.BATCH_FLUSH_MS / 1000
+                while len(done) < min(len(pending), settings.BATCH_FLUSH_ITEMS):
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    more, _ = await asyncio.wait(
+                        pending.keys() - done, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    if not more:
+                        break
+                    done |= more
+                generated = []
+                for future in done:
+                    index = pending.pop(future)
+                    if future.exception() is not None:
+                        failed += 1
+                        yield _ndjson({'type': 'error', 'index': index, 'detail': str(future.exception())})
+                    else:
+                        generated.append((index, body.items[index], future.result()))
+                if not generated:
+                    continue
+
+                try:
+                    events = await run_in_threadpool(_save_batch, generated)
+                except Exception as e:
+                    print(f"Error saving batch: {e}")
+                    failed += len(generated)
+                    for index, _, _ in generated:
+                        yield _ndjson({'type': 'error', 'index': index, 'detail': str(e)})
+                    continue
+                succeeded += len(events)
+                for event in events:
+                    yield _ndjson(event)
+
+            yield _ndjson({'type': 'complete', 'total': len(body.items), 'succeeded': succeeded, 'failed': failed})
+        finally:
+            # Stop queued items if the client went away mid-batch
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    return StreamingResponse(event_stream(), media_type='application/x-ndjson')
+
+
+# ── Background Jobs ───────────────────────────────────────────────────────────
+
+def _run_generation_job(request):
+    """
+    Job worker: generate and persist; the job result holds only the ids (the
+    code lives in blob storage, served by GET /websites/{website_id}).
+    """
+    body = GenerateRequest(**request)
+    db = SessionLocal()
+    try:
+        template_data = _get_template_data(body.template_id)
+        result = llm_service.generate_website(body.prompt, template=template_data, db=db)
+        project, website = _save_generation(db, body, result)
+        return {'project_id': project.id, 'website_id': website.id}
+    finally:
+        db.close()
+
+
+@router.post('/jobs', status_code=202)
+def submit_generation_job(body: GenerateRequest):
+    """Queue a generation and return its job id immediately."""
+    try:
+        job_id = job_queue.submit(_run_generation_job, body.model_dump())
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={'Retry-After': '5'})
+    return {'job_id': job_id, 'status': 'queued'}
+
+
+@router.get('/jobs/{job_id}')
+def get_generation_job(job_id: str):
+    """
+    Poll the status (and, once finished, the project/website ids) of a
+    generation job. Jobs interrupted by a restart are reported as failed.
+    """
+    job = job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
 # ── Projects ──────────────────────────────────────────────────────────────────
 
+PROJECT_LIST_FIELDS = ('id', 'user_id', 'project_name', 'prompt', 'created_at')
+
+
+def _encode_cursor(created_at, project_id):
+    raw = f"{created_at.isoformat()}|{project_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _decode_cursor(cursor):
+    """Decode a page cursor into (created_at, id); raise 400 if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, project_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(project_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _parse_fields(fields):
+    """Validate a comma-separated field projection; default to every list field."""
+    if not fields:
+        return PROJECT_LIST_FIELDS
+    requested = {f.strip() for f in fields.split(',') if f.strip()}
+    unknown = requested - set(PROJECT_LIST_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return tuple(f for f in PROJECT_LIST_FIELDS if f in requested)
+
+
+def _iter_json_array(rows, fields, chunk_size=100):
+    """Encode rows as a JSON array a chunk at a time instead of one big string."""
+    yield '['
+    chunk = []
+    for index, row in enumerate(rows):
+        item = {f: row[f].isoformat() if f == 'created_at' and row[f] else row[f] for f in fields}
+        chunk.append((',' if index else '') + json.dumps(item))
+        if len(chunk) >= chunk_size:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+    yield ']'
+
+
 @router.get('/projects')
-def list_projects(db: Session = Depends(get_db)):
-    """List all projects, newest first."""
-    projects = db.query(Project).order_by(Project.created_at.desc()).all()
-    return [p.to_dict() for p in projects]
+def list_projects(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None),
+    db: Session = Depends(get_db),
+):
+    """
+    List projects, newest first, one keyset-paginated page at a time.
+
+    Pass the X-Next-Cursor response header back as ``cursor`` for the next
+    page; ``fields`` (e.g. ``id,project_name,created_at``) skips unneeded
+    columns such as the full prompt.
+    """
+    selected = _parse_fields(fields)
+    # The cursor columns are always read, even if not returned
+    columns = set(selected) | {'id', 'created_at'}
+    query = db.query(*[getattr(Project, f) for f in PROJECT_LIST_FIELDS if f in columns])
+
+    if cursor:
+        created_at, project_id = _decode_cursor(cursor)
+        query = query.filter(or_(
+            Project.created_at < created_at,
+            and_(Project.created_at == created_at, Project.id < project_id),
+        ))
+
+    rows = [
+        row._asdict()
+        for row in query.order_by(Project.created_at.desc(), Project.id.desc()).limit(limit + 1)
+    ]
+
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers['X-Next-Cursor'] = _encode_cursor(rows[-1]['created_at'], rows[-1]['id'])
+
+    return StreamingResponse(
+        _iter_json_array(rows, selected), media_type='application/json', headers=headers
+    )
+
+
+def _website_summaries(db, project_id):
+    """Metadata and code sizes for a project's websites, without loading the code."""
+    sizes = []
+    query = db.query(GeneratedWebsite.id, GeneratedWebsite.metadata_, GeneratedWebsite.created_at)
+    for field in GeneratedWebsite.CODE_FIELDS:
+        # Blob rows record their size; unmigrated rows fall back to the inline column
+        blob = aliased(CodeBlob)
+        legacy = getattr(GeneratedWebsite, f'{field}_code_legacy')
+        query = query.outerjoin(blob, blob.hash == getattr(GeneratedWebsite, f'{field}_hash'))
+        sizes.append(func.coalesce(blob.size, func.length(legacy), 0).label(f'{field}_size'))
+    rows = (
+        query.add_columns(*sizes)
+        .filter(GeneratedWebsite.project_id == project_id)
+        .order_by(GeneratedWebsite.created_at, GeneratedWebsite.id)
+        .all()
+    )
+    return [
+        {
+            'id': row.id,
+            'project_id': project_id,
+            'version': version,
+            'metadata': row.metadata_,
+            'created_at': row.created_at.isoformat(),
+            'sizes': {'html': row.html_size, 'css': row.css_size, 'js': row.js_size},
+        }
+        for version, row in enumerate(rows, start=1)
+    ]
 
 
 @router.get('/projects/{project_id}')
-def get_project(project_id: int, db: Session = Depends(get_db)):
-    """Get a single project with its generated websites."""
+def get_project(
+    project_id: int,
+    view: str = Query('summary', pattern='^(summary|full)$'),
+    db: Session = Depends(get_db),
+):
+    """
+    Get a single project with its generated websites.
+
+    The default ``summary`` view lists website metadata and code sizes only;
+    fetch code per website via /websites/{id} or /websites/{id}/assets/{asset}.
+    ``view=full`` inlines every version's code.
+    """
+    if view == 'full':
+        websites = selectinload(Project.generated_websites)
+        project = (
+            db.query(Project)
+            .options(websites, *GeneratedWebsite.code_load_options(parent=websites))
+            .filter(Project.id == project_id)
+            .first()
+        )
+        if not project:
+            raise HTTPException(status_code=404, detail="Project not found")
+        return project.to_dict(include_websites=True)
+
     project = db.query(Project).get(project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-    return project.to_dict(include_websites=True)
+    data = project.to_dict()
+    data['generated_websites'] = _website_summaries(db, project_id)
+    return data
+
+
+def _project_versions(db, project_id):
+    """Website ids of a project in version order (version n is index n - 1)."""
+    ids = [
+        website_id
+        for website_id, in db.query(GeneratedWebsite.id)
+        .filter(GeneratedWebsite.project_id == project_id)
+        .order_by(GeneratedWebsite.created_at, GeneratedWebsite.id)
+    ]
+    if not ids and not db.query(Project.id).filter(Project.id == project_id).first():
+        raise HTTPException(status_code=404, detail="Project not found")
+    return ids
+
+
+def _get_version(db, project_id, version, versions):
+    if not 1 <= version <= len(versions):
+        raise HTTPException(status_code=404, detail="Version not found")
+    return (
+        db.query(GeneratedWebsite)
+        .options(*GeneratedWebsite.code_load_options())
+        .filter(GeneratedWebsite.id == versions[version - 1])
+        .first()
+    )
+
+
+@router.get('/projects/{project_id}/versions/{version}')
+def get_project_version(project_id: int, version: int, db: Session = Depends(get_db)):
+    """Get version n (1 = first generation) of a project's website, including its code."""
+    versions = _project_versions(db, project_id)
+    data = _get_version(db, project_id, version, versions).to_dict()
+    data['version'] = version
+    return data
+
+
+@router.get('/projects/{project_id}/diff')
+def diff_project_versions(
+    project_id: int,
+    from_version: int = Query(..., alias='from'),
+    to_version: int = Query(..., alias='to'),
+    db: Session = Depends(get_db),
+):
+    """Unified diffs of the html, css and js between two versions of a project."""
+    versions = _project_versions(db, project_id)
+    old = _get_version(db, project_id, from_version, versions)
+    new = _get_version(db, project_id, to_version, versions)
+    return {
+        'project_id': project_id,
+        'from': from_version,
+        'to': to_version,
+        'diffs': {
+            field: unified_diff(
+                getattr(old, f'{field}_code'),
+                getattr(new, f'{field}_code'),
+                f'v{from_version}/{field}',
+                f'v{to_version}/{field}',
+            )
+            for field in GeneratedWebsite.CODE_FIELDS
+        },
+    }
 
 
 @router.delete('/projects/{project_id}')
 def delete_project(project_id: int, db: Session = Depends(get_db)):
-    """Delete a project and its generated websites."""
+    """Delete a project and its generated websites.
+
+    Code blobs are shared between versions and projects, so they are left in
+    place here and reclaimed by database/gc_code_blobs.py.
+    """
     project = db.query(Project).get(project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
+    website_ids = [w.id for w in project.generated_websites]
     db.delete(project)
     db.commit()
+    for website_id in website_ids:
+        preview_cache.invalidate(website_id)
     return {'message': 'Project deleted.'}
 
 
+# ── Websites ──────────────────────────────────────────────────────────────────
+
+WEBSITE_ASSETS = {
+    'html': 'text/html; charset=utf-8',
+    'css': 'text/css; charset=utf-8',
+    'js': 'application/javascript; charset=utf-8',
+}
+
+
+@router.get('/websites/{website_id}')
+def get_website(website_id: int, db: Session = Depends(get_db)):
+    """Get a single generated website, including its code."""
+    website = (
+        db.query(GeneratedWebsite)
+        .options(*GeneratedWebsite.code_load_options())
+        .filter(GeneratedWebsite.id == website_id)
+        .first()
+    )
+    if not website:
+        raise HTTPException(status_code=404, detail="Website not found")
+    return website.to_dict()
+
+
+@router.get('/websites/{website_id}/assets/{asset}')
+def get_website_asset(website_id: int, asset: str, db: Session = Depends(get_db)):
+    """Get one code asset (html, css or js) of a website as plain text."""
+    if asset not in WEBSITE_ASSETS:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    website = db.query(GeneratedWebsite).get(website_id)
+    if website is None:
+        raise HTTPException(status_code=404, detail="Website not found")
+    # Only this asset's blob (or legacy column) is loaded
+    return Response(content=getattr(website, f'{asset}_code') or '', media_type=WEBSITE_ASSETS[asset])
+
+
+# ── Website Previews ──────────────────────────────────────────────────────────
+
+def _matching_etag(if_none_match, etag):
+    """Return the If-None-Match entry naming any encoding variant of the etag, or None."""
+    if not if_none_match:
+        return None
+    if if_none_match.strip() == '*':
+        return f'"{etag}"'
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.removeprefix('W/').strip('"').split('-', 1)[0] == etag:
+            return candidate
+    return None
+
+
+def _preferred_encoding(accept_encoding, available):
+    """Pick br or gzip from Accept-Encoding when a pre-compressed body exists."""
+    accepted = {
+        part.split(';', 1)[0].strip().lower()
+        for part in (accept_encoding or '').split(',')
+        if not part.strip().endswith(';q=0')
+    }
+    for encoding in ('br', 'gzip'):
+        if encoding in accepted and available.get(encoding) is not None:
+            return encoding
+    return None
+
+
+@router.get('/websites/{website_id}/preview')
+def get_website_preview(website_id: int, request: Request, db: Session = Depends(get_db)):
+    """Serve the assembled preview document with ETag/304 and pre-compressed bodies."""
+    headers = {'Cache-Control': settings.PREVIEW_CACHE_CONTROL, 'Vary': 'Accept-Encoding'}
+
+    # Revalidation only needs the stored hash, not the code columns
+    row = db.query(GeneratedWebsite.preview_etag).filter(GeneratedWebsite.id == website_id).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Website not found")
+    etag = row.preview_etag
+    matched = etag and _matching_etag(request.headers.get('if-none-match'), etag)
+    if matched:
+        return Response(status_code=304, headers={**headers, 'ETag': matched})
+
+    website = (
+        db.query(GeneratedWebsite)
+        .options(undefer(GeneratedWebsite.preview_gzip), undefer(GeneratedWebsite.preview_br))
+        .filter(GeneratedWebsite.id == website_id)
+        .first()
+    )
+    preview = preview_cache.get(website)
+    if not website.preview_etag:
+        website.preview_etag, website.preview_gzip, website.preview_br = build_preview_artifacts(preview)
+        db.commit()
+        etag = website.preview_etag
+        matched = _matching_etag(request.headers.get('if-none-match'), etag)
+        if matched:
+            return Response(status_code=304, headers={**headers, 'ETag': matched})
+
+    encoding = _preferred_encoding(
+        request.headers.get('accept-encoding'),
+        {'br': website.preview_br, 'gzip': website.preview_gzip},
+    )
+    if encoding == 'br':
+        body = website.preview_br
+    elif encoding == 'gzip':
+        body = website.preview_gzip
+    else:
+        body = preview.encode('utf-8')
+
+    # Strong ETags must differ between encodings of the same content
+    headers['ETag'] = f'"{etag}-{encoding}"' if encoding else f'"{etag}"'
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    return Response(content=body, media_type='text/html; charset=utf-8', headers=headers)
+
+
 # ── Templates ─────────────────────────────────────────────────────────────────
 
 @router.get('/templates')
-def list_templates(category: Optional[str] = Query(None), db: Session = Depends(get_db)):
+def list_templates(category: Optional[str] = Query(None)):
     """List all templates, optionally filtered by category."""
-    query = db.query(Template)
-    if category:
-        query = query.filter(Template.category == category)
-    templates = query.order_by(Template.category, Template.name).all()
-    return [t.to_dict() for t in templates]
+    return template_registry.list(category)
 
 
 @router.get('/templates/{template_id}')
-def get_template(template_id: int, db: Session = Depends(get_db)):
+def get_template(template_id: int):
     """Get a single template."""
-    template = db.query(Template).get(template_id)
+    template = template_registry.get(template_id)
     if not template:
         raise HTTPException(status_code=404, detail="Template not found")
-    return template.to_dict()
+    return template
+
+
+# ── Cache ─────────────────────────────────────────────────────────────────────
+
+@router.get('/cache/stats')
+def get_cache_stats():
+    """Hit/miss counters and occupancy of the exact and semantic generation caches."""
+    return {
+        'exact': generation_cache.stats(),
+        'semantic': semantic_cache.stats(),
+    }
+
+
+# ── Database ──────────────────────────────────────────────────────────────────
+
+@router.get('/db/pool')
+def get_pool_stats():
+    """Connection pool occupancy, overflow and checkout wait times."""
+    return pool_stats()
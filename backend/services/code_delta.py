@@ -0,0 +1,43 @@
+import difflib
+import json
+
+
+def make_delta(base, text):
+    """
+    Encode text as a line delta against base.
+
+    The delta is a JSON list whose items are either ``[start, end]`` (copy
+    base lines start:end) or a string of inserted lines, so its size grows
+    with what changed rather than with the size of the file.
+    """
+    base_lines = base.splitlines(keepends=True)
+    lines = text.splitlines(keepends=True)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, base_lines, lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append(''.join(lines[j1:j2]))
+    return json.dumps(ops, separators=(',', ':'))
+
+
+def apply_delta(base, delta):
+    """Rebuild the text a delta from make_delta() was computed for."""
+    base_lines = base.splitlines(keepends=True)
+    return ''.join(
+        op if isinstance(op, str) else ''.join(base_lines[op[0]:op[1]])
+        for op in json.loads(delta)
+    )
+
+
+def unified_diff(old, new, old_label='a', new_label='b'):
+    """Unified diff between two versions of a file, as a single string."""
+    lines = difflib.unified_diff(
+        (old or '').splitlines(),
+        (new or '').splitlines(),
+        fromfile=old_label,
+        tofile=new_label,
+        lineterm='',
+    )
+    return '\n'.join(lines)
@@ -1,17 +1,104 @@
 import re
 
 
+# Fence languages and section labels, mapped to result keys
+FENCE_LANGUAGES = {
+    'html': 'html',
+    'css': 'css',
+    'javascript': 'js',
+    'js': 'js',
+}
+
+# Markers the scanner cares about: ``` fences (with an optional language) and
+# HTML:/CSS:/JS: section labels at line start. Each pattern starts with a
+# literal, which lets re use its fast substring search; folding them into one
+# alternation would fall back to trying every position of the text.
+_FENCE = re.compile(r'```([\w+#.-]*)')
+_LABEL = re.compile(r'\n[ \t]*(HTML|CSS|JS|JavaScript)[ \t]*:')
+_LEADING_LABEL = re.compile(r'[ \t]*(HTML|CSS|JS|JavaScript)[ \t]*:')
+
+
+def _find_markers(text):
+    """Return (start, end, kind, value) for every fence and label, in text order."""
+    markers = [(m.start(), m.end(), 'fence', m.group(1).lower()) for m in _FENCE.finditer(text)]
+    labels = [(m.start() + 1, m.end(), 'label', m.group(1).lower()) for m in _LABEL.finditer(text)]
+    leading = _LEADING_LABEL.match(text)
+    if leading:
+        labels.insert(0, (0, leading.end(), 'label', leading.group(1).lower()))
+    if labels:
+        markers = sorted(markers + labels)
+    return markers
+
+
+def scan_code_blocks(text):
+    """
+    Extract every code block from LLM output in linear time.
+
+    Understands fenced blocks (```html ... ```), the ``HTML:/CSS:/JS:``
+    label format and unlabeled fences inside a labeled section. An
+    unterminated fence (truncated output) runs to the end of the text.
+    Returns lists of blocks per language plus an ``unterminated`` flag.
+    """
+    blocks = {'html': [], 'css': [], 'js': []}
+    in_fence = False
+    fence_key = None
+    fence_start = 0
+    label_key = None
+    label_start = 0
+
+    for start, end, kind, value in _find_markers(text):
+        if kind == 'fence':
+            if in_fence:
+                _add_block(blocks, fence_key, text[fence_start:start])
+                in_fence = False
+                if not value:
+                    continue
+                # A fence with a language while one is open: treat as close + open
+            elif label_key is not None:
+                _add_block(blocks, label_key, text[label_start:start])
+
+            fence_key = FENCE_LANGUAGES.get(value) if value else label_key
+            fence_start = end
+            in_fence = True
+            label_key = None
+        elif not in_fence:
+            if label_key is not None:
+                _add_block(blocks, label_key, text[label_start:start])
+            label_key = FENCE_LANGUAGES[value]
+            label_start = end
+
+    if in_fence:
+        _add_block(blocks, fence_key, text[fence_start:])
+    elif label_key is not None:
+        _add_block(blocks, label_key, text[label_start:])
+
+    blocks['unterminated'] = in_fence
+    return blocks
+
+
+def _add_block(blocks, key, content):
+    content = content.strip()
+    if key and content:
+        blocks[key].append(content)
+
+
+def join_blocks(blocks, key):
+    """Join all blocks of one language into a single source string."""
+    return '\n\n'.join(blocks[key])
+
+
 def parse_generated_code(raw_text):
     """
     Extract HTML, CSS, and JS blocks from raw LLM output.
-    Supports fenced code blocks (```html ... ```) and
-    falls back to treating the entire output as HTML.
+    Supports fenced code blocks (```html ... ```) and HTML:/CSS:/JS: labels,
+    and falls back to treating the entire output as HTML.
     """
-    html = extract_block(raw_text, 'html')
-    css = extract_block(raw_text, 'css')
-    js = extract_block(raw_text, 'javascript') or extract_block(raw_text, 'js')
+    blocks = scan_code_blocks(raw_text)
+    html = join_blocks(blocks, 'html')
+    css = join_blocks(blocks, 'css')
+    js = join_blocks(blocks, 'js')
 
-    # If no fenced blocks found, treat the whole thing as HTML
+    # If no code blocks found, treat the whole thing as HTML
     if not html and not css and not js:
         html = raw_text.strip()
 
@@ -22,31 +109,334 @@ def parse_generated_code(raw_text):
     }
 
 
-def extract_block(text, language):
-    """Extract a fenced code block for the given language."""
-    pattern = rf'```{language}\s*(.*?)```'
-    match = re.search(pattern, text, re.DOTALL | re.IGNORECASE)
-    return match.group(1).strip() if match else ''
+class IncrementalCodeParser:
+    """
+    Extract fenced code blocks from LLM output as it streams in.
+
+    feed() returns (language, delta) pairs as soon as a block opens, so
+    callers can forward partial HTML/CSS/JS before generation finishes.
+    """
+
+    FENCE = '```'
 
+    def __init__(self):
+        self._raw = []
+        self._buffer = ''
+        self._language = None
+        self._in_block = False
 
-def combine_code(html, css, js):
+    def feed(self, chunk):
+        """Consume a chunk of raw text and return the newly available deltas."""
+        self._raw.append(chunk)
+        self._buffer += chunk
+        deltas = []
+
+        while True:
+            if not self._in_block:
+                start = self._buffer.find(self.FENCE)
+                if start == -1:
+                    # Keep a possible partial fence for the next chunk
+                    self._buffer = self._buffer[-(len(self.FENCE) - 1):]
+                    break
+                line_end = self._buffer.find('\n', start)
+                if line_end == -1:
+                    self._buffer = self._buffer[start:]
+                    break
+                language = self._buffer[start + len(self.FENCE):line_end].rstrip().lower()
+                self._language = FENCE_LANGUAGES.get(language)
+                self._in_block = True
+                self._buffer = self._buffer[line_end + 1:]
+            else:
+                end = self._buffer.find(self.FENCE)
+                if end == -1:
+                    # Hold back trailing backticks that may start the closing fence
+                    held = len(self._buffer) - len(self._buffer.rstrip('`'))
+                    text = self._buffer[:len(self._buffer) - held]
+                    self._buffer = self._buffer[len(text):]
+                    if text and self._language:
+                        deltas.append((self._language, text))
+                    break
+                text = self._buffer[:end]
+                if text and self._language:
+                    deltas.append((self._language, text))
+                self._buffer = self._buffer[end + len(self.FENCE):]
+                self._in_block = False
+                self._language = None
+
+        return deltas
+
+    def close(self):
+        """Flush any text left in an unterminated block."""
+        deltas = []
+        if self._in_block and self._language and self._buffer:
+            deltas.append((self._language, self._buffer))
+        self._buffer = ''
+        self._in_block = False
+        self._language = None
+        return deltas
+
+    @property
+    def raw_text(self):
+        return ''.join(self._raw)
+
+    def result(self):
+        """Return the parsed html/css/js for everything fed so far."""
+        return parse_generated_code(self.raw_text)
+
+
+_HEAD_CLOSE = re.compile(r'</head\s*>', re.IGNORECASE)
+_BODY_CLOSE = re.compile(r'</body\s*>', re.IGNORECASE)
+
+
+def assemble_preview(html, css, js):
     """
-    Combine separate HTML, CSS, and JS into a single self-contained HTML document.
-    Useful for rendering in an iframe preview.
+    Build the preview document as a list of string slices.
+
+    The </head> and last </body> insertion points are located once,
+    case-insensitively, without lowercasing or copying the whole document;
+    combine_code joins the parts once.
     """
     style_block = f"\n<style>\n{css}\n</style>" if css else ""
     script_block = f"\n<script>\n{js}\n</script>" if js else ""
 
-    # If the HTML already has <head>, inject styles there
-    if '<head>' in html.lower():
-        combined = html.replace('</head>', f'{style_block}\n</head>')
+    head = _HEAD_CLOSE.search(html)
+    body = None
+    for body in _BODY_CLOSE.finditer(html, head.end() if head else 0):
+        pass
+
+    parts = []
+    position = 0
+
+    # If the HTML already has a </head>, inject styles there
+    if head:
+        parts += [html[:head.start()], style_block, '\n']
+        position = head.start()
     else:
-        combined = f"{style_block}\n{html}"
+        parts += [style_block, '\n']
 
     # Inject JS before closing body
-    if '</body>' in combined.lower():
-        combined = combined.replace('</body>', f'{script_block}\n</body>')
+    if body:
+        parts += [html[position:body.start()], script_block, '\n', html[body.start():]]
     else:
-        combined = f"{combined}{script_block}"
+        parts += [html[position:], script_block]
+
+    return [part for part in parts if part]
+
+
+def combine_code(html, css, js):
+    """
+    Combine separate HTML, CSS, and JS into a single self-contained HTML document.
+    Useful for rendering in an iframe preview.
+    """
+    return ''.join(assemble_preview(html, css, js))
+
+
+def split_css_rules(css):
+    """Split a stylesheet into top-level rules (at-rule blocks stay whole)."""
+    rules = []
+    depth = 0
+    start = 0
+    for index, char in enumerate(css):
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                rules.append(css[start:index + 1].strip())
+                start = index + 1
+    tail = css[start:].strip()
+    if tail:
+        rules.append(tail)
+    return rules
+
+
+# Script/style bodies and comments may contain '<' or tag-like text; they are
+# removed before looking at the markup. An opener left after that was cut off.
+_OPAQUE_SECTIONS = re.compile(r'<script\b.*?</script\s*>|<style\b.*?</style\s*>|<!--.*?-->', re.S | re.I)
+_OPAQUE_OPENER = re.compile(r'<script\b|<style\b|<!--', re.I)
+_REQUIRED_CLOSERS = (
+    (re.compile(r'<body\b', re.I), re.compile(r'</body\s*>', re.I)),
+    (re.compile(r'<html\b', re.I), re.compile(r'</html\s*>', re.I)),
+)
+
+
+def _cut_off_html(html):
+    markup = _OPAQUE_SECTIONS.sub('', html)
+    if _OPAQUE_OPENER.search(markup):
+        return True
+    # Output ending inside a tag: an opening '<' after the last '>'
+    if markup.rfind('<') > markup.rfind('>'):
+        return True
+    return any(opener.search(markup) and not closer.search(markup) for opener, closer in _REQUIRED_CLOSERS)
+
+
+def find_truncation(raw_text):
+    """
+    Tell whether LLM output looks cut off, e.g. by the max_new_tokens limit.
+
+    Returns 'unterminated_fence' when a code fence is never closed, or, for
+    output without fences, 'unterminated_html' when the document ends inside
+    a tag, script, style or comment or lacks its </body>/</html>. Returns
+    None for output that looks complete.
+    """
+    blocks = scan_code_blocks(raw_text)
+    if blocks['unterminated']:
+        return 'unterminated_fence'
+    if '```' not in raw_text:
+        html = join_blocks(blocks, 'html') if blocks['html'] else raw_text
+        if _cut_off_html(html):
+            return 'unterminated_html'
+    return None
+
+
+def continuation_tail(raw_text, max_chars):
+    """
+    The end of a truncated output to resume from: at most max_chars,
+    starting at a line boundary, always running to the very end.
+    """
+    if len(raw_text) <= max_chars:
+        return raw_text
+    tail = raw_text[-max_chars:]
+    line_start = tail.find('\n')
+    return tail[line_start + 1:] if 0 <= line_start < len(tail) - 1 else tail
+
+
+_HTML_CLOSE = re.compile(r'</html\s*>', re.I)
+
+
+def completed_blocks(raw_text):
+    """Result keys ('html', 'css', 'js') of the blocks already finished in truncated output."""
+    blocks = scan_code_blocks(raw_text)
+    complete = {key for key in ('html', 'css', 'js') if blocks[key]}
+    if blocks['unterminated']:
+        opener = None
+        for opener in _FENCE.finditer(raw_text):
+            pass
+        complete.discard(FENCE_LANGUAGES.get(opener.group(1).lower()))
+    return complete
+
+
+class ContinuationJoiner:
+    """
+    Append a continuation to truncated output as it streams in.
+
+    Models often restart the continuation a little before the cut; at least
+    ``probe`` characters are held back until the longest overlap (of at
+    least ``min_overlap`` characters) with the end of the text is known and
+    dropped. A resumed fence is followed by the blocks still missing; blocks
+    for languages the text already has are discarded, so a model repeating
+    e.g. the HTML after finishing the CSS does not duplicate it. Unfenced
+    output ends at </html> or the first fence.
+    """
+
+    FENCE = '```'
+
+    def __init__(self, text, probe=400, min_overlap=16):
+        self.text = text
+        self.probe = probe
+        self.min_overlap = min_overlap
+        self.done = False
+        self._in_fence = scan_code_blocks(text)['unterminated']
+        self._complete = completed_blocks(text)
+        # 'open' (the resumed block), 'between' blocks, or inside a block to 'keep' / 'drop'
+        self._state = 'open'
+        self._head = ''
+        self._settled = False
+        # Trailing backticks that may start a fence, and the last accepted characters
+        self._pending = ''
+        self._recent = text[-8:]
+
+    def feed(self, chunk):
+        """Consume a continuation chunk; return the text to append (may be empty)."""
+        if self._settled:
+            return self._accept(chunk)
+        self._head += chunk
+        if len(self._head) < self.probe:
+            return ''
+        return self._settle()
+
+    def close(self):
+        """Flush held-back text at the end of the continuation."""
+        text = '' if self._settled else self._settle()
+        return text + self._accept('', final=True)
+
+    def _settle(self):
+        self._settled = True
+        head = self._head
+        for size in range(min(len(head), len(self.text)), self.min_overlap - 1, -1):
+            if self.text.endswith(head[:size]):
+                head = head[size:]
+                break
+        return self._accept(head)
+
+    def _accept(self, chunk, final=False):
+        if self.done:
+            return ''
+        chunk = self._pending + chunk
+        self._pending = ''
+        accepted = self._accept_blocks(chunk, final) if self._in_fence else self._accept_document(chunk, final)
+        self.text += accepted
+        return accepted
+
+    def _hold_backticks(self, chunk, final):
+        held = 0 if final else len(chunk) - len(chunk.rstrip('`'))
+        self._pending = chunk[len(chunk) - held:]
+        return chunk[:len(chunk) - held]
+
+    def _accept_blocks(self, chunk, final):
+        accepted = []
+        while chunk:
+            if self._state == 'between':
+                start = chunk.find(self.FENCE)
+                if start == -1:
+                    accepted.append(self._hold_backticks(chunk, final))
+                    break
+                accepted.append(chunk[:start])
+                chunk = chunk[start:]
+                line_end = chunk.find('\n')
+                if line_end == -1:
+                    # Wait for the rest of the opening fence line
+                    self._pending = '' if final else chunk
+                    break
+                language = FENCE_LANGUAGES.get(chunk[len(self.FENCE):line_end].strip().lower())
+                self._state = 'drop' if language in self._complete else 'keep'
+                if self._state == 'keep':
+                    accepted.append(chunk[:line_end + 1])
+                chunk = chunk[line_end + 1:]
+            else:
+                end = chunk.find(self.FENCE)
+                if end == -1:
+                    text = self._hold_backticks(chunk, final)
+                    if self._state != 'drop':
+                        accepted.append(text)
+                    break
+                if self._state != 'drop':
+                    accepted.append(chunk[:end + len(self.FENCE)])
+                chunk = chunk[end + len(self.FENCE):]
+                self._state = 'between'
+        return ''.join(accepted)
+
+    def _accept_document(self, chunk, final):
+        chunk = self._hold_backticks(chunk, final)
+        window = self._recent + chunk
+        stops = []
+        fence = window.find(self.FENCE)
+        if fence != -1:
+            stops.append(fence)
+        html_close = next((m for m in _HTML_CLOSE.finditer(window) if m.end() > len(self._recent)), None)
+        if html_close:
+            stops.append(html_close.end())
+        if stops:
+            chunk = chunk[:max(0, min(stops) - len(self._recent))]
+            self.done = True
+            self._pending = ''
+        self._recent = (self._recent + chunk)[-8:]
+        return chunk
+
 
-    return combined
+def stitch_continuation(raw_text, continuation):
+    """Join truncated output and its continuation, dropping any repeated overlap."""
+    joiner = ContinuationJoiner(raw_text)
+    joiner.feed(continuation)
+    joiner.close()
+    return joiner.text
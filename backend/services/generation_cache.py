@@ -0,0 +1,136 @@
+import asyncio
+import hashlib
+import json
+import re
+import threading
+import unicodedata
+
+from config import settings
+from models import GeneratedWebsite
+from services.lru_cache import LRUCache
+from services.template_registry import template_registry
+
+
+class GenerationCache:
+    """
+    Content-addressed cache for generated websites.
+
+    Keys are a SHA-256 over the normalized prompt, the base template and the
+    model parameters. Lookups hit the in-process LRU tier first, then
+    (optionally) generated_websites rows stored with a matching cache_key.
+    """
+
+    _PUNCTUATION = re.compile(r'[^\w\s]')
+    _WHITESPACE = re.compile(r'\s+')
+
+    def __init__(self, memory=None, persistent=True, enabled=True):
+        self.memory = memory or LRUCache()
+        self.enabled = enabled
+        self.persistent = persistent
+        self._counters = {'memory_hits': 0, 'persistent_hits': 0, 'misses': 0}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def normalize_prompt(cls, prompt):
+        """Case-fold, strip punctuation and collapse whitespace."""
+        text = unicodedata.normalize('NFKC', prompt).casefold()
+        text = cls._PUNCTUATION.sub(' ', text)
+        return cls._WHITESPACE.sub(' ', text).strip()
+
+    def make_key(self, prompt, template=None, params=None):
+        """Build the cache key for a prompt, base template and model parameters."""
+        template_part = None
+        if template:
+            template_part = {
+                'id': template.get('id'),
+                'content': template_registry.content_hash(template),
+            }
+        material = json.dumps(
+            {'prompt': self.normalize_prompt(prompt), 'template': template_part, 'params': params or {}},
+            sort_keys=True,
+        )
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    def get(self, key, db=None):
+        """Look up a result in the memory tier, then the persistent tier if a session is given."""
+        if not self.enabled:
+            return None
+        result = self._get_memory(key)
+        if result is None and db is not None:
+            result = self._get_persistent(key, db)
+        if result is None:
+            self._count('misses')
+        return result
+
+    async def aget(self, key, db=None):
+        """Async variant of get; the persistent lookup runs in a worker thread."""
+        if not self.enabled:
+            return None
+        result = self._get_memory(key)
+        if result is None and db is not None:
+            result = await asyncio.to_thread(self._get_persistent, key, db)
+        if result is None:
+            self._count('misses')
+        return result
+
+    def put(self, key, result):
+        """Store a result in the memory tier; the persistent tier is written with the row itself."""
+        if not self.enabled:
+            return
+        value = {'html': result['html'], 'css': result['css'], 'js': result['js'], 'cache_key': key}
+        self.memory.put(key, value, size=self._result_size(value))
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        hits = counters['memory_hits'] + counters['persistent_hits']
+        lookups = hits + counters['misses']
+        return {
+            **counters,
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'entries': len(self.memory),
+            'bytes': self.memory.size_bytes,
+        }
+
+    def _get_memory(self, key):
+        value = self.memory.get(key)
+        if value is None:
+            return None
+        self._count('memory_hits')
+        return dict(value)
+
+    def _get_persistent(self, key, db):
+        if not self.persistent:
+            return None
+        website = (
+            db.query(GeneratedWebsite)
+            .filter(GeneratedWebsite.cache_key == key)
+            .order_by(GeneratedWebsite.id.desc())
+            .first()
+        )
+        if website is None:
+            return None
+        self._count('persistent_hits')
+        result = {'html': website.html_code or '', 'css': website.css_code or '', 'js': website.js_code or ''}
+        self.put(key, result)
+        return {**result, 'cache_key': key}
+
+    def _count(self, counter):
+        with self._lock:
+            self._counters[counter] += 1
+
+    @staticmethod
+    def _result_size(result):
+        return sum(len(result.get(k) or '') for k in ('html', 'css', 'js'))
+
+
+# Module-level singleton
+generation_cache = GenerationCache(
+    memory=LRUCache(
+        max_entries=settings.GENERATION_CACHE_MAX_ENTRIES,
+        max_bytes=settings.GENERATION_CACHE_MAX_BYTES,
+        ttl=settings.GENERATION_CACHE_TTL,
+    ),
+    persistent=settings.GENERATION_CACHE_PERSISTENT,
+    enabled=settings.GENERATION_CACHE_ENABLED,
+)
@@ -0,0 +1,193 @@
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from config import settings
+from models import SessionLocal, GenerationJob
+
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while the queue is at its depth limit."""
+
+
+PENDING_STATUSES = ('queued', 'running')
+INTERRUPTED_ERROR = 'Job was interrupted before it finished (server restart); submit it again'
+
+
+class MemoryJobStore:
+    """Keeps job state in a process-local dict; lost on restart."""
+
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def create(self, job_id, request):
+        job = GenerationJob(id=job_id, status='queued', request=request, created_at=datetime.utcnow())
+        with self._lock:
+            self._jobs[job_id] = job
+
+    def update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            for name, value in fields.items():
+                setattr(job, name, value)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def fail_stale(self, cutoff):
+        count = 0
+        with self._lock:
+            for job in self._jobs.values():
+                if job.status in PENDING_STATUSES and (job.started_at or job.created_at) < cutoff:
+                    job.status, job.error, job.finished_at = 'failed', INTERRUPTED_ERROR, datetime.utcnow()
+                    count += 1
+        return count
+
+
+class SqlJobStore:
+    """Persists job state in the generation_jobs table (Postgres or SQLite)."""
+
+    def create(self, job_id, request):
+        db = SessionLocal()
+        try:
+            db.add(GenerationJob(id=job_id, status='queued', request=request))
+            db.commit()
+        finally:
+            db.close()
+
+    def update(self, job_id, **fields):
+        db = SessionLocal()
+        try:
+            db.query(GenerationJob).filter(GenerationJob.id == job_id).update(fields)
+            db.commit()
+        finally:
+            db.close()
+
+    def get(self, job_id):
+        db = SessionLocal()
+        try:
+            job = db.query(GenerationJob).get(job_id)
+            return job.to_dict() if job else None
+        finally:
+            db.close()
+
+    def fail_stale(self, cutoff):
+        """Mark jobs still pending since before cutoff as failed; returns how many."""
+        db = SessionLocal()
+        try:
+            count = (
+                db.query(GenerationJob)
+                .filter(
+                    GenerationJob.status.in_(PENDING_STATUSES),
+                    func.coalesce(GenerationJob.started_at, GenerationJob.created_at) < cutoff,
+                )
+                .update(
+                    {'status': 'failed', 'error': INTERRUPTED_ERROR, 'finished_at': datetime.utcnow()},
+                    synchronize_session=False,
+                )
+            )
+            db.commit()
+            return count
+        finally:
+            db.close()
+
+
+class JobQueue:
+    """
+    In-process background job runner with a bounded worker pool.
+
+    submit() returns a job id immediately and raises JobQueueFull once
+    max_queue_depth jobs are queued or running, so callers can shed load
+    instead of piling requests up behind slow generations.
+
+    Jobs live only in the process that queued them; rows a restart left
+    queued/running are failed once they are ``stale_after`` seconds old (by
+    recover() at startup, or when polled), so polling always ends. The age
+    cutoff keeps other live worker processes' jobs untouched.
+    """
+
+    def __init__(self, store, max_workers=4, max_queue_depth=100, stale_after=900):
+        self.store = store
+        self.max_workers = max_workers
+        self.max_queue_depth = max_queue_depth
+        self.stale_after = stale_after
+        self._executor = None
+        self._depth = 0
+        self._lock = threading.Lock()
+
+    def submit(self, fn, request):
+        """Queue fn(request) and return the new job id."""
+        with self._lock:
+            if self._depth >= self.max_queue_depth:
+                raise JobQueueFull(f"Job queue is full ({self.max_queue_depth} jobs pending)")
+            self._depth += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix='generation-job'
+                )
+
+        job_id = uuid.uuid4().hex
+        try:
+            self.store.create(job_id, request)
+            self._executor.submit(self._run, job_id, fn, request)
+        except Exception:
+            self._release()
+            raise
+        return job_id
+
+    def get(self, job_id):
+        job = self.store.get(job_id)
+        if job and job['status'] in PENDING_STATUSES:
+            since = datetime.fromisoformat(job['started_at'] or job['created_at'])
+            if since < self._stale_cutoff():
+                self.recover()
+                job = self.store.get(job_id)
+        return job
+
+    def recover(self):
+        """Fail jobs orphaned by a restart (pending for longer than stale_after)."""
+        return self.store.fail_stale(self._stale_cutoff())
+
+    def _stale_cutoff(self):
+        return datetime.utcnow() - timedelta(seconds=self.stale_after)
+
+    @property
+    def depth(self):
+        return self._depth
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    def _run(self, job_id, fn, request):
+        try:
+            self.store.update(job_id, status='running', started_at=datetime.utcnow())
+            result = fn(request)
+            self.store.update(job_id, status='succeeded', result=result, finished_at=datetime.utcnow())
+        except Exception as e:
+            print(f"Generation job {job_id} failed: {e}")
+            self.store.update(job_id, status='failed', error=str(e), finished_at=datetime.utcnow())
+        finally:
+            self._release()
+
+    def _release(self):
+        with self._lock:
+            self._depth -= 1
+
+
+# Module-level singleton
+job_queue = JobQueue(
+    store=MemoryJobStore() if settings.JOB_STORE == 'memory' else SqlJobStore(),
+    max_workers=settings.JOB_WORKERS,
+    max_queue_depth=settings.JOB_QUEUE_DEPTH,
+    stale_after=settings.JOB_STALE_AFTER,
+)
@@ -1,7 +1,99 @@
+import asyncio
 import os
 import requests
+import httpx
 import json
-import re
+import threading
+from requests.adapters import HTTPAdapter
+
+from services.code_parser import (
+    scan_code_blocks, join_blocks, find_truncation, continuation_tail, stitch_continuation, ContinuationJoiner,
+    completed_blocks,
+)
+from services.generation_cache import generation_cache
+from services.semantic_cache import semantic_cache
+from services.template_registry import template_registry, render_prompt_fragment
+from services.prompt_budget import PromptBudget, PromptTooLong
+from services.mock_site import render_mock_site
+from services.prompt_classifier import classify_prompt
+from services.site_composer import compose_site, same_structure
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls that share a key into one execution.
+    The first caller runs the function; callers arriving while it is in
+    flight block and receive the same result (or exception).
+    """
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return dict(call.result)
+
+        try:
+            call.result = fn(*args)
+            return dict(call.result)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    @property
+    def in_flight(self):
+        return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """
+    SingleFlight for coroutines sharing one event loop.
+
+    The shared call runs as its own task; the caller that started it and
+    every follower await it through a shield, so cancelling any of them
+    (including the first) leaves the call running for the others.
+    """
+
+    def __init__(self):
+        self._futures = {}
+
+    async def do(self, key, fn, *args):
+        task = self._futures.get(key)
+        if task is None:
+            task = self._futures[key] = asyncio.ensure_future(fn(*args))
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return dict(await asyncio.shield(task))
+
+    def _finish(self, key, task):
+        if self._futures.get(key) is task:
+            del self._futures[key]
+        if not task.cancelled():
+            # Mark the exception retrieved when every caller was cancelled
+            task.exception()
+
+    @property
+    def in_flight(self):
+        return len(self._futures)
 
 
 class LLMService:
@@ -30,525 +122,438 @@ Requirements:
 - Use Google Fonts for typography
 - Make it visually appealing and production-ready"""
 
+    COPY_PROMPT = """You are a website copywriter. Rewrite the visible text of the HTML below
+so it fits the website description. Keep every tag, attribute and class exactly as
+it is and change only the text between tags. Return ONLY the HTML in a ```html block."""
+
+    CONTINUE_PROMPT = """You are finishing website code that was cut off. Continue exactly where
+the text below stops, without repeating anything already written. Complete the open code
+block, then write the ```html, ```css and ```javascript blocks that are still missing."""
+
     def __init__(self):
         self.api_token = os.getenv('HF_API_TOKEN', '')
         self.model_id = os.getenv('HF_MODEL_ID', 'meta-llama/Llama-2-7b-chat-hf')
         self.api_url = f"https://api-inference.huggingface.co/models/{self.model_id}"
+        self.generation_params = {
+            "max_new_tokens": int(os.getenv('LLM_MAX_NEW_TOKENS', '2048')),
+            "temperature": 0.7,
+            "top_p": 0.9,
+            "return_full_text": False,
+        }
+
+        # Prompt and completion share the context window; base templates are
+        # trimmed so that at least LLM_MIN_NEW_TOKENS remain for the completion
+        self.prompt_budget = PromptBudget(
+            context_window=int(os.getenv('LLM_CONTEXT_WINDOW', '4096')),
+            max_new_tokens=self.generation_params["max_new_tokens"],
+            min_new_tokens=int(os.getenv('LLM_MIN_NEW_TOKENS', '1024')),
+        )
+
+        # Cut-off outputs are resumed from their last LLM_CONTINUATION_TAIL characters
+        self.max_continuations = int(os.getenv('LLM_MAX_CONTINUATIONS', '2'))
+        self.continuation_tail = int(os.getenv('LLM_CONTINUATION_TAIL', '2000'))
+
+        # Connection pool sizing for the shared keep-alive HTTP clients
+        self.max_connections = int(os.getenv('HF_MAX_CONNECTIONS', '200'))
+        self.max_keepalive = int(os.getenv('HF_MAX_KEEPALIVE', '50'))
+        self.timeout = float(os.getenv('HF_TIMEOUT', '120'))
+
+        self._session = None
+        self._async_client = None
+        self._client_lock = threading.Lock()
+
+        # Identical concurrent generations share one upstream call
+        self._flight = SingleFlight()
+        self._async_flight = AsyncSingleFlight()
+
+    # ── HTTP clients ─────────────────────────────────────────────────────────
+
+    @property
+    def session(self):
+        """Pooled keep-alive requests.Session for the sync code path."""
+        if self._session is None:
+            with self._client_lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_keepalive)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    session.headers['Authorization'] = f"Bearer {self.api_token}"
+                    self._session = session
+        return self._session
+
+    @property
+    def async_client(self):
+        """Pooled keep-alive httpx.AsyncClient for the async code path."""
+        if self._async_client is None or self._async_client.is_closed:
+            self._async_client = httpx.AsyncClient(
+                headers={"Authorization": f"Bearer {self.api_token}"},
+                timeout=httpx.Timeout(self.timeout, connect=10.0),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive,
+                ),
+            )
+        return self._async_client
+
+    async def aclose(self):
+        """Close the pooled clients; runs on application shutdown (registered by routes/api.py)."""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    # ── Generation ───────────────────────────────────────────────────────────
 
-    def generate_website(self, prompt, template=None):
+    def generate_website(self, prompt, template=None, db=None):
         """
         Generate website code from a natural language prompt.
-        Falls back to a mock response if the API is unavailable.
+        Serves repeated prompts from the generation cache (pass a session as
+        db to also consult stored websites and near-duplicate prompts) and
+        falls back to a mock response if the API is unavailable.
         """
-        # Build the full prompt
-        if template:
-            full_prompt = (
-                f"{self.SYSTEM_PROMPT}\n\n"
-                f"Use the following template as a starting point and customize it based on the user's request:\n"
-                f"Template HTML:\n{template.get('html_template', '')}\n"
-                f"Template CSS:\n{template.get('css_template', '')}\n\n"
-                f"User request: {prompt}"
-            )
-        else:
-            full_prompt = f"{self.SYSTEM_PROMPT}\n\nUser request: {prompt}"
+        cache_key = self.cache_key(prompt, template)
+        cached = generation_cache.get(cache_key, db=db)
+        if cached:
+            return cached
+
+        if db is not None:
+            similar = semantic_cache.get(prompt, db, template_id=(template or {}).get('id'))
+            if similar:
+                generation_cache.put(cache_key, similar)
+                return {**similar, 'cache_key': cache_key}
+
+        full_prompt, usage = self._build_prompt(prompt, template)
 
         # Try Hugging Face Inference API
         if self.api_token:
             try:
-                return self._call_hf_api(full_prompt)
+                result = self._flight.do(cache_key, self._call_hf_api, full_prompt, usage['max_new_tokens'])
+                generation_cache.put(cache_key, result)
+                return {**result, 'cache_key': cache_key, 'usage': self._usage(usage, result)}
             except Exception as e:
                 print(f"HF API error: {e}. Falling back to mock generation.")
 
         # Fallback: generate a mock website based on the prompt
         return self._generate_mock(prompt)
 
-    def _call_hf_api(self, prompt):
-        """Call the Hugging Face Inference API."""
-        headers = {"Authorization": f"Bearer {self.api_token}"}
+    def compose_website(self, prompt, title=None, rewrite_copy=False):
+        """
+        Assemble a site from the component template library without generation.
+        With rewrite_copy, the LLM only rewrites the visible text for the prompt;
+        its answer is used if it keeps the markup structure intact.
+        """
+        site = compose_site(prompt, template_registry.by_category(), title, classify_prompt(prompt))
+        if rewrite_copy and self.api_token:
+            try:
+                rewritten = self._call_hf_api(
+                    f"{self.COPY_PROMPT}\n\nWebsite description: {prompt}\n\n```html\n{site['html']}\n```"
+                )['html']
+                if same_structure(site['html'], rewritten):
+                    site['html'] = rewritten
+            except Exception as e:
+                print(f"HF API error: {e}. Keeping template copy.")
+        return site
+
+    def stream_website(self, prompt, template=None):
+        """
+        Generate website code as a stream of raw text chunks.
+        Yields tokens as the model produces them; falls back to streaming
+        the mock website if the API is unavailable before the first token,
+        and re-raises errors after it.
+        """
+        full_prompt, usage = self._build_prompt(prompt, template)
+
+        if self.api_token:
+            started = False
+            try:
+                chunks = []
+                for token in self._stream_hf_api(full_prompt, usage['max_new_tokens']):
+                    started = True
+                    chunks.append(token)
+                    yield token
+
+                # Resume a cut-off output; callers see one uninterrupted stream
+                raw_text = ''.join(chunks)
+                for _ in range(self.max_continuations):
+                    if not find_truncation(raw_text):
+                        break
+                    continuation_prompt, budget = self._continuation_prompt(raw_text)
+                    joiner = ContinuationJoiner(raw_text)
+                    for token in self._stream_hf_api(continuation_prompt, budget['max_new_tokens']):
+                        text = joiner.feed(token)
+                        if text:
+                            yield text
+                    text = joiner.close()
+                    if not text.strip():
+                        break
+                    yield text
+                    raw_text = joiner.text
+                return
+            except Exception as e:
+                if started:
+                    # Half a site is not a result; let the caller report the error
+                    print(f"HF API stream interrupted: {e}")
+                    raise
+                print(f"HF API error: {e}. Falling back to mock generation.")
+
+        yield from self._stream_mock(prompt)
+
+    async def agenerate_website(self, prompt, template=None, db=None):
+        """Async variant of generate_website using the pooled httpx client."""
+        cache_key = self.cache_key(prompt, template)
+        cached = await generation_cache.aget(cache_key, db=db)
+        if cached:
+            return cached
+
+        if db is not None:
+            similar = await asyncio.to_thread(
+                semantic_cache.get, prompt, db, (template or {}).get('id')
+            )
+            if similar:
+                generation_cache.put(cache_key, similar)
+                return {**similar, 'cache_key': cache_key}
+
+        full_prompt, usage = self._build_prompt(prompt, template)
+
+        if self.api_token:
+            try:
+                result = await self._async_flight.do(
+                    cache_key, self._acall_hf_api, full_prompt, usage['max_new_tokens']
+                )
+                generation_cache.put(cache_key, result)
+                return {**result, 'cache_key': cache_key, 'usage': self._usage(usage, result)}
+            except Exception as e:
+                print(f"HF API error: {e}. Falling back to mock generation.")
+
+        return self._generate_mock(prompt)
+
+    async def astream_website(self, prompt, template=None):
+        """Async variant of stream_website using the pooled httpx client."""
+        full_prompt, usage = self._build_prompt(prompt, template)
+
+        if self.api_token:
+            started = False
+            try:
+                chunks = []
+                async for token in self._astream_hf_api(full_prompt, usage['max_new_tokens']):
+                    started = True
+                    chunks.append(token)
+                    yield token
+
+                raw_text = ''.join(chunks)
+                for _ in range(self.max_continuations):
+                    if not find_truncation(raw_text):
+                        break
+                    continuation_prompt, budget = self._continuation_prompt(raw_text)
+                    joiner = ContinuationJoiner(raw_text)
+                    async for token in self._astream_hf_api(continuation_prompt, budget['max_new_tokens']):
+                        text = joiner.feed(token)
+                        if text:
+                            yield text
+                    text = joiner.close()
+                    if not text.strip():
+                        break
+                    yield text
+                    raw_text = joiner.text
+                return
+            except Exception as e:
+                if started:
+                    # Half a site is not a result; let the caller report the error
+                    print(f"HF API stream interrupted: {e}")
+                    raise
+                print(f"HF API error: {e}. Falling back to mock generation.")
+
+        for chunk in self._stream_mock(prompt):
+            yield chunk
+
+    def cache_key(self, prompt, template=None):
+        """Generation cache key for a prompt under the current model and parameters."""
+        return generation_cache.make_key(
+            prompt, template, {'model_id': self.model_id, **self.generation_params}
+        )
+
+    def _build_prompt(self, prompt, template=None):
+        """
+        Build the full LLM prompt, optionally seeded with a base template,
+        within the token budget; returns (prompt, usage).
+        """
+        if template:
+            return self.prompt_budget.build(
+                f"{self.SYSTEM_PROMPT}\n\n",
+                f"User request: {prompt}",
+                template=template,
+                fragment=template_registry.prompt_fragment(template),
+                render_fragment=render_prompt_fragment,
+            )
+        return self.prompt_budget.build(f"{self.SYSTEM_PROMPT}\n\n", f"User request: {prompt}")
+
+    def _usage(self, usage, result):
+        """Prompt/completion token split for a generation."""
+        completion = ''.join(result.get(part) or '' for part in ('html', 'css', 'js'))
+        return {
+            **usage,
+            'completion_tokens': self.prompt_budget.count_tokens(completion),
+            'continuations': result.get('continuations', 0),
+        }
+
+    @staticmethod
+    def _completed_note(raw_text):
+        complete = completed_blocks(raw_text)
+        if not complete:
+            return ''
+        names = ', '.join(
+            language for key, language in (('html', 'html'), ('css', 'css'), ('js', 'javascript')) if key in complete
+        )
+        return f"Already complete, do not write again: {names}\n"
+
+    def _continuation_prompt(self, raw_text):
+        """Prompt resuming a cut-off output from its tail; returns (prompt, usage)."""
+        max_chars = self.continuation_tail
+        while True:
+            try:
+                return self.prompt_budget.build(
+                    f"{self.CONTINUE_PROMPT}\n{self._completed_note(raw_text)}\n",
+                    continuation_tail(raw_text, max_chars),
+                )
+            except PromptTooLong:
+                # Dense code can use more tokens per character than expected; resume from less
+                if max_chars < 200:
+                    raise
+                max_chars //= 2
+
+    def _generation_payload(self, prompt, stream=False, max_new_tokens=None):
+        """Build the Inference API request payload."""
         payload = {
             "inputs": prompt,
-            "parameters": {
-                "max_new_tokens": 2048,
-                "temperature": 0.7,
-                "top_p": 0.9,
-                "return_full_text": False,
-            }
+            "parameters": dict(self.generation_params),
         }
+        if max_new_tokens is not None:
+            payload["parameters"]["max_new_tokens"] = max_new_tokens
+        if stream:
+            payload["stream"] = True
+        return payload
 
-        response = requests.post(self.api_url, headers=headers, json=payload, timeout=120)
+    def _call_hf_api(self, prompt, max_new_tokens=None):
+        """
+        Call the Hugging Face Inference API. Output that stops mid-block is
+        resumed with up to max_continuations follow-up requests and stitched
+        together before parsing.
+        """
+        raw_text = self._request_text(prompt, max_new_tokens)
+        continuations = 0
+        while continuations < self.max_continuations and find_truncation(raw_text):
+            continuation_prompt, budget = self._continuation_prompt(raw_text)
+            continuation = self._request_text(continuation_prompt, budget['max_new_tokens'])
+            stitched = stitch_continuation(raw_text, continuation)
+            if not stitched[len(raw_text):].strip():
+                break
+            raw_text = stitched
+            continuations += 1
+        return {**self._parse_code(raw_text), 'continuations': continuations}
+
+    async def _acall_hf_api(self, prompt, max_new_tokens=None):
+        """Call the Hugging Face Inference API without blocking the event loop."""
+        raw_text = await self._arequest_text(prompt, max_new_tokens)
+        continuations = 0
+        while continuations < self.max_continuations and find_truncation(raw_text):
+            continuation_prompt, budget = self._continuation_prompt(raw_text)
+            continuation = await self._arequest_text(continuation_prompt, budget['max_new_tokens'])
+            stitched = stitch_continuation(raw_text, continuation)
+            if not stitched[len(raw_text):].strip():
+                break
+            raw_text = stitched
+            continuations += 1
+        return {**self._parse_code(raw_text), 'continuations': continuations}
+
+    def _request_text(self, prompt, max_new_tokens=None):
+        """One Inference API request; returns the generated text."""
+        payload = self._generation_payload(prompt, max_new_tokens=max_new_tokens)
+
+        response = self.session.post(self.api_url, json=payload, timeout=self.timeout)
         response.raise_for_status()
 
-        result = response.json()
-        if isinstance(result, list) and len(result) > 0:
-            generated_text = result[0].get('generated_text', '')
-        else:
-            generated_text = str(result)
+        return self._extract_generated_text(response.json())
 
-        return self._parse_code(generated_text)
+    async def _arequest_text(self, prompt, max_new_tokens=None):
+        payload = self._generation_payload(prompt, max_new_tokens=max_new_tokens)
+
+        response = await self.async_client.post(self.api_url, json=payload)
+        response.raise_for_status()
+
+        return self._extract_generated_text(response.json())
+
+    @staticmethod
+    def _extract_generated_text(result):
+        """Pull the generated text out of an Inference API JSON response."""
+        if isinstance(result, list) and len(result) > 0:
+            return result[0].get('generated_text', '')
+        return str(result)
+
+    def _stream_hf_api(self, prompt, max_new_tokens=None):
+        """Call the Hugging Face Inference API in streaming (SSE) mode, yielding token text."""
+        payload = self._generation_payload(prompt, stream=True, max_new_tokens=max_new_tokens)
+
+        with self.session.post(self.api_url, json=payload, stream=True, timeout=self.timeout) as response:
+            response.raise_for_status()
+            for line in response.iter_lines(decode_unicode=True):
+                token = self._parse_stream_event(line)
+                if token:
+                    yield token
+
+    async def _astream_hf_api(self, prompt, max_new_tokens=None):
+        """Async streaming (SSE) call to the Inference API, yielding token text."""
+        payload = self._generation_payload(prompt, stream=True, max_new_tokens=max_new_tokens)
+
+        async with self.async_client.stream('POST', self.api_url, json=payload) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                token = self._parse_stream_event(line)
+                if token:
+                    yield token
+
+    @staticmethod
+    def _parse_stream_event(line):
+        """Extract the token text from one server-sent event line, if any."""
+        if not line or not line.startswith('data:'):
+            return ''
+        event = json.loads(line[len('data:'):])
+        if 'error' in event:
+            raise RuntimeError(event['error'])
+        token = event.get('token') or {}
+        if token.get('special'):
+            return ''
+        return token.get('text', '')
+
+    def _stream_mock(self, prompt):
+        """Stream the mock website line by line in the same fenced format the LLM uses."""
+        result = self._generate_mock(prompt)
+        raw_text = (
+            f"```html\n{result['html']}\n```\n\n"
+            f"```css\n{result['css']}\n```\n\n"
+            f"```javascript\n{result['js']}\n```\n"
+        )
+        yield from raw_text.splitlines(keepends=True)
 
     def _parse_code(self, raw_text):
         """Extract HTML, CSS, and JS from the LLM's response."""
-        html_match = re.search(r'```html\s*(.*?)```', raw_text, re.DOTALL)
-        css_match = re.search(r'```css\s*(.*?)```', raw_text, re.DOTALL)
-        js_match = re.search(r'```(?:javascript|js)\s*(.*?)```', raw_text, re.DOTALL)
+        blocks = scan_code_blocks(raw_text)
 
         return {
-            'html': html_match.group(1).strip() if html_match else raw_text.strip(),
-            'css': css_match.group(1).strip() if css_match else '',
-            'js': js_match.group(1).strip() if js_match else '',
+            'html': join_blocks(blocks, 'html') or raw_text.strip(),
+            'css': join_blocks(blocks, 'css'),
+            'js': join_blocks(blocks, 'js'),
         }
 
     def _generate_mock(self, prompt):
         """Generate a polished mock website when the API is unavailable."""
         # Extract key info from the prompt
-        prompt_lower = prompt.lower()
-        title = "My Website"
-        if 'portfolio' in prompt_lower:
-            title = "Portfolio"
-        elif 'landing' in prompt_lower:
-            title = "Landing Page"
-        elif 'blog' in prompt_lower:
-            title = "Blog"
-        elif 'restaurant' in prompt_lower:
-            title = "Restaurant"
-        elif 'store' in prompt_lower or 'shop' in prompt_lower:
-            title = "Online Store"
-
-        is_dark = 'dark' in prompt_lower
-
-        bg_color = '#0f0f1a' if is_dark else '#ffffff'
-        text_color = '#e0e0e0' if is_dark else '#333333'
-        accent = '#6c63ff'
-        card_bg = '#1a1a2e' if is_dark else '#f8f9fa'
-
-        html = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{title}</title>
-    <link href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;600;700&display=swap" rel="stylesheet">
-</head>
-<body>
-    <nav class="navbar">
-        <div class="nav-container">
-            <a href="#" class="logo">{title}</a>
-            <ul class="nav-links">
-                <li><a href="#home">Home</a></li>
-                <li><a href="#about">About</a></li>
-                <li><a href="#services">Services</a></li>
-                <li><a href="#contact">Contact</a></li>
-            </ul>
-            <button class="mobile-toggle" aria-label="Toggle menu">&#9776;</button>
-        </div>
-    </nav>
-
-    <section id="home" class="hero">
-        <div class="hero-content">
-            <h1 class="hero-title">Welcome to <span class="gradient-text">{title}</span></h1>
-            <p class="hero-subtitle">Built with AI — powered by your imagination</p>
-            <div class="hero-buttons">
-                <a href="#services" class="btn btn-primary">Explore</a>
-                <a href="#contact" class="btn btn-outline">Get in Touch</a>
-            </div>
-        </div>
-        <div class="hero-decoration"></div>
-    </section>
-
-    <section id="about" class="section">
-        <div class="container">
-            <h2 class="section-title">About Us</h2>
-            <p class="section-text">We craft beautiful digital experiences that captivate and inspire. Our passion lies in turning ideas into reality through elegant design and powerful technology.</p>
-        </div>
-    </section>
-
-    <section id="services" class="section section-alt">
-        <div class="container">
-            <h2 class="section-title">Our Services</h2>
-            <div class="cards-grid">
-                <div class="card">
-                    <div class="card-icon">&#9881;</div>
-                    <h3>Web Design</h3>
-                    <p>Stunning, responsive designs that look great on any device.</p>
-                </div>
-                <div class="card">
-                    <div class="card-icon">&#9889;</div>
-                    <h3>Development</h3>
-                    <p>Clean, efficient code built with modern technologies.</p>
-                </div>
-                <div class="card">
-                    <div class="card-icon">&#9734;</div>
-                    <h3>Branding</h3>
-                    <p>Memorable brand identities that tell your story.</p>
-                </div>
-            </div>
-        </div>
-    </section>
-
-    <section id="contact" class="section">
-        <div class="container">
-            <h2 class="section-title">Contact Us</h2>
-            <form class="contact-form" onsubmit="handleSubmit(event)">
-                <input type="text" placeholder="Your Name" required />
-                <input type="email" placeholder="Your Email" required />
-                <textarea placeholder="Your Message" rows="5" required></textarea>
-                <button type="submit" class="btn btn-primary">Send Message</button>
-            </form>
-        </div>
-    </section>
-
-    <footer class="footer">
-        <div class="container">
-            <p>&copy; 2026 {title}. Generated with AI Website Generator.</p>
-        </div>
-    </footer>
-</body>
-</html>"""
-
-        css = f"""/* === Reset & Base === */
-*, *::before, *::after {{
-    margin: 0;
-    padding: 0;
-    box-sizing: border-box;
-}}
-
-body {{
-    font-family: 'Inter', sans-serif;
-    background-color: {bg_color};
-    color: {text_color};
-    line-height: 1.6;
-    overflow-x: hidden;
-}}
-
-a {{
-    text-decoration: none;
-    color: inherit;
-}}
-
-/* === Navbar === */
-.navbar {{
-    position: fixed;
-    top: 0;
-    width: 100%;
-    z-index: 1000;
-    background: {'rgba(15,15,26,0.85)' if is_dark else 'rgba(255,255,255,0.85)'};
-    backdrop-filter: blur(12px);
-    border-bottom: 1px solid {'rgba(255,255,255,0.08)' if is_dark else 'rgba(0,0,0,0.06)'};
-}}
-
-.nav-container {{
-    max-width: 1200px;
-    margin: 0 auto;
-    padding: 1rem 2rem;
-    display: flex;
-    justify-content: space-between;
-    align-items: center;
-}}
-
-.logo {{
-    font-size: 1.5rem;
-    font-weight: 700;
-    background: linear-gradient(135deg, {accent}, #ff6584);
-    -webkit-background-clip: text;
-    -webkit-text-fill-color: transparent;
-}}
-
-.nav-links {{
-    display: flex;
-    list-style: none;
-    gap: 2rem;
-}}
-
-.nav-links a {{
-    font-weight: 500;
-    transition: color 0.3s;
-}}
-
-.nav-links a:hover {{
-    color: {accent};
-}}
-
-.mobile-toggle {{
-    display: none;
-    background: none;
-    border: none;
-    color: {text_color};
-    font-size: 1.5rem;
-    cursor: pointer;
-}}
-
-/* === Hero === */
-.hero {{
-    min-height: 100vh;
-    display: flex;
-    align-items: center;
-    justify-content: center;
-    text-align: center;
-    padding: 6rem 2rem 4rem;
-    position: relative;
-    overflow: hidden;
-}}
-
-.hero-decoration {{
-    position: absolute;
-    width: 600px;
-    height: 600px;
-    background: radial-gradient(circle, {accent}22, transparent 70%);
-    top: 50%;
-    left: 50%;
-    transform: translate(-50%, -50%);
-    pointer-events: none;
-}}
-
-.hero-title {{
-    font-size: clamp(2.5rem, 6vw, 4.5rem);
-    font-weight: 700;
-    margin-bottom: 1rem;
-    position: relative;
-    z-index: 1;
-}}
-
-.gradient-text {{
-    background: linear-gradient(135deg, {accent}, #ff6584, #43e97b);
-    -webkit-background-clip: text;
-    -webkit-text-fill-color: transparent;
-}}
-
-.hero-subtitle {{
-    font-size: 1.25rem;
-    opacity: 0.7;
-    margin-bottom: 2.5rem;
-    position: relative;
-    z-index: 1;
-}}
-
-.hero-buttons {{
-    display: flex;
-    gap: 1rem;
-    justify-content: center;
-    position: relative;
-    z-index: 1;
-}}
-
-/* === Buttons === */
-.btn {{
-    padding: 0.85rem 2rem;
-    border-radius: 50px;
-    font-weight: 600;
-    font-size: 1rem;
-    cursor: pointer;
-    transition: all 0.3s ease;
-    border: 2px solid {accent};
-    display: inline-block;
-}}
-
-.btn-primary {{
-    background: {accent};
-    color: #fff;
-    border-color: {accent};
-}}
-
-.btn-primary:hover {{
-    background: transparent;
-    color: {accent};
-    transform: translateY(-2px);
-    box-shadow: 0 8px 30px {accent}44;
-}}
-
-.btn-outline {{
-    background: transparent;
-    color: {accent};
-}}
-
-.btn-outline:hover {{
-    background: {accent};
-    color: #fff;
-    transform: translateY(-2px);
-}}
-
-/* === Sections === */
-.section {{
-    padding: 6rem 2rem;
-}}
-
-.section-alt {{
-    background: {card_bg};
-}}
-
-.container {{
-    max-width: 1100px;
-    margin: 0 auto;
-}}
-
-.section-title {{
-    font-size: 2.2rem;
-    font-weight: 700;
-    text-align: center;
-    margin-bottom: 1rem;
-}}
-
-.section-text {{
-    text-align: center;
-    max-width: 650px;
-    margin: 0 auto;
-    opacity: 0.8;
-    font-size: 1.1rem;
-}}
-
-/* === Cards === */
-.cards-grid {{
-    display: grid;
-    grid-template-columns: repeat(auto-fit, minmax(280px, 1fr));
-    gap: 2rem;
-    margin-top: 3rem;
-}}
-
-.card {{
-    background: {'#16213e' if is_dark else '#ffffff'};
-    border-radius: 16px;
-    padding: 2.5rem 2rem;
-    text-align: center;
-    transition: transform 0.3s, box-shadow 0.3s;
-    border: 1px solid {'rgba(255,255,255,0.06)' if is_dark else 'rgba(0,0,0,0.06)'};
-}}
-
-.card:hover {{
-    transform: translateY(-8px);
-    box-shadow: 0 20px 60px {'rgba(108,99,255,0.15)' if is_dark else 'rgba(0,0,0,0.1)'};
-}}
-
-.card-icon {{
-    font-size: 2.5rem;
-    margin-bottom: 1rem;
-}}
-
-.card h3 {{
-    font-size: 1.3rem;
-    margin-bottom: 0.75rem;
-}}
-
-.card p {{
-    opacity: 0.7;
-    font-size: 0.95rem;
-}}
-
-/* === Contact Form === */
-.contact-form {{
-    max-width: 550px;
-    margin: 2rem auto 0;
-    display: flex;
-    flex-direction: column;
-    gap: 1rem;
-}}
-
-.contact-form input,
-.contact-form textarea {{
-    padding: 1rem 1.25rem;
-    border-radius: 12px;
-    border: 1px solid {'rgba(255,255,255,0.12)' if is_dark else 'rgba(0,0,0,0.12)'};
-    background: {'#1a1a2e' if is_dark else '#f8f9fa'};
-    color: {text_color};
-    font-family: inherit;
-    font-size: 1rem;
-    transition: border-color 0.3s;
-}}
-
-.contact-form input:focus,
-.contact-form textarea:focus {{
-    outline: none;
-    border-color: {accent};
-}}
-
-/* === Footer === */
-.footer {{
-    padding: 2rem;
-    text-align: center;
-    opacity: 0.5;
-    font-size: 0.9rem;
-    border-top: 1px solid {'rgba(255,255,255,0.06)' if is_dark else 'rgba(0,0,0,0.06)'};
-}}
-
-/* === Responsive === */
-@media (max-width: 768px) {{
-    .nav-links {{
-        display: none;
-    }}
-    .mobile-toggle {{
-        display: block;
-    }}
-    .hero-buttons {{
-        flex-direction: column;
-        align-items: center;
-    }}
-}}"""
-
-        js = """// Mobile navigation toggle
-document.addEventListener('DOMContentLoaded', () => {
-    const toggle = document.querySelector('.mobile-toggle');
-    const navLinks = document.querySelector('.nav-links');
-
-    if (toggle) {
-        toggle.addEventListener('click', () => {
-            navLinks.style.display = navLinks.style.display === 'flex' ? 'none' : 'flex';
-            navLinks.style.flexDirection = 'column';
-            navLinks.style.position = 'absolute';
-            navLinks.style.top = '100%';
-            navLinks.style.left = '0';
-            navLinks.style.right = '0';
-            navLinks.style.padding = '1rem 2rem';
-            navLinks.style.background = 'inherit';
-        });
-    }
-
-    // Smooth scroll for anchor links
-    document.querySelectorAll('a[href^="#"]').forEach(anchor => {
-        anchor.addEventListener('click', (e) => {
-            e.preventDefault();
-            const target = document.querySelector(anchor.getAttribute('href'));
-            if (target) {
-                target.scrollIntoView({ behavior: 'smooth', block: 'start' });
-            }
-        });
-    });
-
-    // Scroll-triggered fade-in animations
-    const observer = new IntersectionObserver((entries) => {
-        entries.forEach(entry => {
-            if (entry.isIntersecting) {
-                entry.target.style.opacity = '1';
-                entry.target.style.transform = 'translateY(0)';
-            }
-        });
-    }, { threshold: 0.1 });
-
-    document.querySelectorAll('.card, .section-title, .section-text').forEach(el => {
-        el.style.opacity = '0';
-        el.style.transform = 'translateY(30px)';
-        el.style.transition = 'opacity 0.6s ease, transform 0.6s ease';
-        observer.observe(el);
-    });
-});
-
-// Contact form handler
-function handleSubmit(event) {
-    event.preventDefault();
-    const btn = event.target.querySelector('button[type="submit"]');
-    btn.textContent = 'Sent!';
-    btn.style.background = '#43e97b';
-    btn.style.borderColor = '#43e97b';
-    setTimeout(() => {
-        btn.textContent = 'Send Message';
-        btn.style.background = '';
-        btn.style.borderColor = '';
-        event.target.reset();
-    }, 2000);
-}"""
-
-        return {
-            'html': html,
-            'css': css,
-            'js': js,
-        }
+        classification = classify_prompt(prompt)
+        theme = 'dark' if classification['theme'] == 'dark' else 'light'
+        accent = next(iter(classification['colors'].values()), None)
+        return render_mock_site(classification['title'], theme, accent)
 
 
 # Module-level singleton
@@ -0,0 +1,52 @@
+import gzip
+import hashlib
+
+from config import settings
+from services.code_parser import combine_code
+from services.lru_cache import LRUCache
+
+try:
+    import brotli
+except ImportError:  # Optional: previews are served gzip-only without it
+    brotli = None
+
+
+class PreviewCache:
+    """
+    Assembled preview documents for stored websites, keyed by website id.
+    Stored websites are never edited in place, so an entry stays valid
+    until the website is deleted or evicted.
+    """
+
+    def __init__(self, memory=None):
+        self.memory = memory or LRUCache(ttl=None)
+
+    def get(self, website):
+        """Return the preview HTML for a GeneratedWebsite, assembling it at most once."""
+        preview = self.memory.get(website.id)
+        if preview is None:
+            preview = combine_code(website.html_code or '', website.css_code or '', website.js_code or '')
+            self.memory.put(website.id, preview, size=len(preview))
+        return preview
+
+    def invalidate(self, website_id):
+        self.memory.invalidate(website_id)
+
+
+def build_preview_artifacts(preview):
+    """Return (etag, gzip body, brotli body or None) for an assembled preview."""
+    data = preview.encode('utf-8')
+    etag = hashlib.sha256(data).hexdigest()
+    gzipped = gzip.compress(data, compresslevel=9, mtime=0)
+    brotlied = brotli.compress(data, mode=brotli.MODE_TEXT) if brotli else None
+    return etag, gzipped, brotlied
+
+
+# Module-level singleton
+preview_cache = PreviewCache(
+    memory=LRUCache(
+        max_entries=settings.PREVIEW_CACHE_MAX_ENTRIES,
+        max_bytes=settings.PREVIEW_CACHE_MAX_BYTES,
+        ttl=None,
+    ),
+)
@@ -0,0 +1,187 @@
+"""
+Fit generation prompts into the model's context window.
+
+The prompt and the completion share the context window. Base templates
+are minified, then trimmed step by step (responsive/animation rules, hover
+states, trailing CSS rules, trailing markup, finally the whole template)
+until the prompt leaves at least ``min_new_tokens`` for the completion.
+"""
+import re
+from functools import lru_cache
+
+from services.code_parser import split_css_rules
+
+# Pieces the estimate counts: ASCII letter runs, runs of extra whitespace,
+# and any other single character (digits, punctuation, non-ASCII letters)
+_TOKEN_PIECES = re.compile(r"[A-Za-z]+|\s{2,}|\S")
+
+_HTML_COMMENT = re.compile(r"<!--.*?-->", re.S)
+_BETWEEN_TAGS = re.compile(r">\s+<")
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_CSS_PUNCTUATION_SPACE = re.compile(r"\s*([{}:;,>])\s*")
+_WHITESPACE = re.compile(r"\s+")
+_STATE_SELECTOR = re.compile(r":(?:hover|focus|active|visited|focus-within|focus-visible)\b")
+
+
+def estimate_tokens(text):
+    """
+    Approximate (and rather over- than under-) count of Llama tokens in text.
+
+    Letter runs count one token per 4 characters, so long identifiers and
+    data: URIs are not a single token; digits (hex colors, sizes) count one
+    each, as Llama splits numbers into digits; so do punctuation marks and
+    non-ASCII characters; whitespace beyond a single space counts per character.
+    """
+    tokens = 0
+    for piece in _TOKEN_PIECES.findall(text):
+        if piece[0].isspace():
+            tokens += len(piece) - 1
+        elif len(piece) > 4:
+            tokens += -(-len(piece) // 4)
+        else:
+            tokens += 1
+    return tokens
+
+
+def minify_html(html):
+    html = _HTML_COMMENT.sub('', html or '')
+    return _WHITESPACE.sub(' ', _BETWEEN_TAGS.sub('><', html)).strip()
+
+
+def minify_css(css):
+    css = _CSS_COMMENT.sub('', css or '')
+    css = _CSS_PUNCTUATION_SPACE.sub(r'\1', _WHITESPACE.sub(' ', css))
+    return css.replace(';}', '}').strip()
+
+
+def minify_template(template):
+    """Copy of a template dict with minified html_template/css_template."""
+    return {
+        **template,
+        'html_template': minify_html(template.get('html_template')),
+        'css_template': minify_css(template.get('css_template')),
+    }
+
+
+def _drop_at_rules(html, css):
+    return html, ''.join(rule for rule in split_css_rules(css) if not rule.startswith('@'))
+
+
+def _drop_state_rules(html, css):
+    return html, ''.join(
+        rule for rule in split_css_rules(css) if not _STATE_SELECTOR.search(rule.split('{', 1)[0])
+    )
+
+
+def _halve_css(html, css):
+    rules = split_css_rules(css)
+    return html, ''.join(rules[:len(rules) // 2])
+
+
+def _halve_html(html, css):
+    # Cut at a tag boundary so the model still sees well-formed-looking markup
+    cut = html.rfind('<', 0, len(html) // 2)
+    return (html[:cut] if cut > 0 else ''), css
+
+
+def _drop_template(html, css):
+    return '', ''
+
+
+# (name, step, repeatable)
+TRIM_STEPS = (
+    ('css_at_rules', _drop_at_rules, False),
+    ('css_states', _drop_state_rules, False),
+    ('css_truncated', _halve_css, True),
+    ('html_truncated', _halve_html, True),
+    ('template_dropped', _drop_template, False),
+)
+
+
+class PromptTooLong(ValueError):
+    """The prompt leaves too little of the context window for the completion, even without a template."""
+
+
+class PromptBudget:
+    """
+    Token budget for one model: ``context_window`` tokens shared by prompt and
+    completion, completions capped at ``max_new_tokens`` and guaranteed at
+    least ``min_new_tokens``. ``safety_margin`` tokens of the window are left
+    unused to absorb counting error (default 1/16 of the window; pass 0 with
+    the model's own tokenizer as count_tokens).
+    """
+
+    def __init__(self, context_window=4096, max_new_tokens=2048, min_new_tokens=1024, count_tokens=None,
+                 safety_margin=None):
+        self.context_window = context_window
+        self.max_new_tokens = max_new_tokens
+        self.min_new_tokens = min(min_new_tokens, max_new_tokens)
+        self.count_tokens = count_tokens or estimate_tokens
+        self.safety_margin = context_window // 16 if safety_margin is None else safety_margin
+        # System prompts and template fragments repeat across requests; count each once
+        self._count_cached = lru_cache(maxsize=1024)(self.count_tokens)
+
+    @property
+    def prompt_limit(self):
+        return self.context_window - self.safety_margin - self.min_new_tokens
+
+    def fit_fragment(self, fixed_tokens, fragment, template, render_fragment):
+        """
+        Trim a template until fixed_tokens plus its rendered fragment fit the prompt limit.
+
+        Returns (fragment, fragment_tokens, trim steps applied).
+        """
+        tokens = self._count_cached(fragment)
+        if fixed_tokens + tokens <= self.prompt_limit:
+            return fragment, tokens, []
+
+        trimmed = []
+        html = minify_html(template.get('html_template'))
+        css = minify_css(template.get('css_template'))
+        for name, step, repeatable in TRIM_STEPS:
+            while True:
+                new_html, new_css = step(html, css)
+                if (new_html, new_css) == (html, css):
+                    break
+                html, css = new_html, new_css
+                if name not in trimmed:
+                    trimmed.append(name)
+                if not html and not css:
+                    return '', 0, trimmed
+                fragment = render_fragment({**template, 'html_template': html, 'css_template': css})
+                tokens = self.count_tokens(fragment)
+                if fixed_tokens + tokens <= self.prompt_limit:
+                    return fragment, tokens, trimmed
+                if not repeatable:
+                    break
+        return fragment, tokens, trimmed
+
+    def build(self, head, tail, template=None, fragment='', render_fragment=None):
+        """
+        Assemble head + template fragment + tail within budget.
+
+        Returns (prompt, usage) where usage reports ``prompt_tokens``,
+        ``template_tokens``, the ``max_new_tokens`` left for the completion
+        and the ``trimmed`` steps applied to the template. Raises
+        PromptTooLong if head and tail alone leave fewer than
+        ``min_new_tokens``.
+        """
+        fixed_tokens = self._count_cached(head) + self.count_tokens(tail)
+        trimmed = []
+        template_tokens = 0
+        if template:
+            fragment, template_tokens, trimmed = self.fit_fragment(fixed_tokens, fragment, template, render_fragment)
+        prompt_tokens = fixed_tokens + template_tokens
+        if prompt_tokens > self.prompt_limit:
+            raise PromptTooLong(
+                f"Prompt is too long: about {prompt_tokens} tokens, at most {self.prompt_limit} "
+                f"fit with room for the generated code"
+            )
+        usage = {
+            'prompt_tokens': prompt_tokens,
+            'template_tokens': template_tokens,
+            'max_new_tokens': min(self.max_new_tokens, self.context_window - self.safety_margin - prompt_tokens),
+            'context_window': self.context_window,
+            'trimmed': trimmed,
+        }
+        return f"{head}{fragment}{tail}", usage
@@ -0,0 +1,138 @@
+"""
+Keyword classification of website prompts.
+
+All keywords are compiled into one alternation regex, so a prompt is
+classified in a single scan regardless of how many keywords there are.
+Each match adds its weight to a category, or sets a style attribute
+(theme, colors).
+"""
+import re
+
+GENERIC = 'generic'
+
+# Category keywords and weights; on equal scores the earlier category wins
+CATEGORY_KEYWORDS = {
+    'portfolio': {
+        'portfolio': 3, 'photographer': 2, 'photography': 2, 'designer': 1.5, 'artist': 1.5,
+        'resume': 2, 'cv': 2, 'showcase': 1, 'my work': 1.5, 'personal website': 1.5,
+    },
+    'landing_page': {
+        'landing page': 3, 'landing': 2.5, 'startup': 1.5, 'saas': 1.5, 'launch': 1,
+        'product page': 1.5, 'waitlist': 1.5, 'app': 0.5,
+    },
+    'blog': {
+        'blog': 3, 'blogging': 3, 'articles': 1.5, 'posts': 1, 'journal': 1.5, 'magazine': 1.5,
+        'newsletter': 1, 'writer': 1,
+    },
+    'restaurant': {
+        'restaurant': 3, 'cafe': 2.5, 'café': 2.5, 'bakery': 2.5, 'bistro': 2.5, 'pizzeria': 2.5,
+        'coffee shop': 2.5, 'menu': 1.5, 'reservation': 1, 'catering': 1.5,
+    },
+    'ecommerce': {
+        'ecommerce': 3, 'e-commerce': 3, 'online store': 3, 'store': 2.5, 'shop': 2.5,
+        'boutique': 2, 'products': 1.5, 'cart': 2, 'checkout': 2,
+    },
+}
+
+CATEGORY_TITLES = {
+    'portfolio': 'Portfolio',
+    'landing_page': 'Landing Page',
+    'blog': 'Blog',
+    'restaurant': 'Restaurant',
+    'ecommerce': 'Online Store',
+    GENERIC: 'My Website',
+}
+
+THEME_KEYWORDS = {
+    'dark': 'dark', 'dark mode': 'dark', 'night': 'dark', 'black': 'dark', 'midnight': 'dark',
+    'light': 'light', 'light mode': 'light', 'white': 'light', 'bright': 'light',
+}
+
+COLOR_KEYWORDS = {
+    'red': '#e63946', 'orange': '#f77f00', 'yellow': '#ffbe0b', 'gold': '#d4af37',
+    'green': '#2a9d8f', 'teal': '#14b8a6', 'blue': '#3a86ff', 'navy': '#1d3557',
+    'purple': '#6c63ff', 'violet': '#8b5cf6', 'pink': '#ff6584', 'brown': '#8d6e63',
+    'gray': '#6b7280', 'grey': '#6b7280', 'pastel': '#cdb4db',
+}
+
+# keyword -> list of ('category', name, weight) / ('theme', value) / ('color', name, hex)
+_ACTIONS = {}
+for _category, _keywords in CATEGORY_KEYWORDS.items():
+    for _keyword, _weight in _keywords.items():
+        _ACTIONS.setdefault(_keyword, []).append(('category', _category, _weight))
+for _keyword, _theme in THEME_KEYWORDS.items():
+    _ACTIONS.setdefault(_keyword, []).append(('theme', _theme))
+for _keyword, _color in COLOR_KEYWORDS.items():
+    _ACTIONS.setdefault(_keyword, []).append(('color', _keyword, _color))
+
+# Longest keywords first so "landing page" wins over "landing". Keywords
+# match whole words with plural/verb endings ("restaurants", "shopping");
+# a space in a keyword also matches a hyphen ("landing-page").
+_KEYWORDS = re.compile(
+    r'(?<!\w)('
+    + '|'.join(re.escape(k).replace(r'\ ', r'[\s-]+') for k in sorted(_ACTIONS, key=len, reverse=True))
+    + r')(?:e?s|\w?ing|\w?ed)?(?!\w)'
+)
+_SEPARATORS = re.compile(r'[\s-]+')
+_CATEGORY_ORDER = {category: index for index, category in enumerate(CATEGORY_KEYWORDS)}
+
+
+def classify_prompt(prompt):
+    """
+    Classify a prompt in one pass.
+
+    Returns a dict with the winning ``category`` (or 'generic'), its
+    ``confidence`` (share of the total keyword weight), per-category
+    ``scores``, the ``theme`` ('dark', 'light' or None if unspecified), the
+    ``colors`` mentioned as {name: hex}, the matched ``keywords`` and a
+    default ``title`` for the site.
+    """
+    scores = {}
+    theme = None
+    colors = {}
+    keywords = []
+    for match in _KEYWORDS.finditer(prompt.lower()):
+        keyword = match.group(1)
+        if keyword not in _ACTIONS:
+            keyword = _SEPARATORS.sub(' ', keyword)
+        keywords.append(keyword)
+        for action in _ACTIONS[keyword]:
+            if action[0] == 'category':
+                scores[action[1]] = scores.get(action[1], 0) + action[2]
+            elif action[0] == 'theme':
+                # The first explicit theme word wins ("dark with white text")
+                theme = theme or action[1]
+            else:
+                colors.setdefault(action[1], action[2])
+
+    if scores:
+        category = min(scores, key=lambda c: (-scores[c], _CATEGORY_ORDER[c]))
+        # Share of the keyword weight, discounted until one strong keyword (3) is seen
+        confidence = round(scores[category] / sum(scores.values()) * min(1.0, scores[category] / 3), 3)
+    else:
+        category, confidence = GENERIC, 0.0
+
+    return {
+        'category': category,
+        'confidence': confidence,
+        'scores': scores,
+        'theme': theme,
+        'colors': colors,
+        'keywords': keywords,
+        'title': CATEGORY_TITLES[category],
+    }
+
+
+def prompt_partition(classification):
+    """
+    Small integer identifying (category, theme); prompts in different
+    partitions should never share generated output.
+    """
+    themes = (None, 'dark', 'light')
+    categories = (GENERIC,) + tuple(CATEGORY_KEYWORDS)
+    return categories.index(classification['category']) * len(themes) + themes.index(classification['theme'])
+
+
+def classify_prompts(prompts):
+    """Classify many prompts, e.g. the stored prompt history."""
+    return [classify_prompt(prompt) for prompt in prompts]
@@ -0,0 +1,197 @@
+import threading
+import zlib
+
+import numpy as np
+
+from config import settings
+from models import Project, GeneratedWebsite
+from services.generation_cache import GenerationCache
+from services.prompt_classifier import classify_prompt, classify_prompts, prompt_partition
+
+
+class HashingEmbedder:
+    """
+    Embed prompts into a fixed-size vector with the hashing trick.
+    Uses word unigrams plus character trigrams, so reordered wording and
+    inflections ("photographer" / "photography") land close together.
+    No model download is needed and embedding runs in microseconds on CPU.
+    """
+
+    STOPWORDS = frozenset({
+        'a', 'an', 'the', 'for', 'of', 'with', 'and', 'to', 'in', 'on', 'my', 'our',
+        'me', 'i', 'we', 'us', 'is', 'that', 'this', 'some', 'please', 'create',
+        'make', 'build', 'generate', 'design', 'website', 'site', 'web', 'webpage',
+    })
+
+    def __init__(self, dim=1024, ngram=3, ngram_weight=0.5):
+        self.dim = dim
+        self.ngram = ngram
+        self.ngram_weight = ngram_weight
+
+    def tokens(self, text):
+        words = GenerationCache.normalize_prompt(text).split()
+        return [w for w in words if w not in self.STOPWORDS]
+
+    def embed(self, text):
+        """Return an L2-normalized float32 vector for the text."""
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in self.tokens(text):
+            vector[self._bucket(f'w:{word}')] += 1.0
+            padded = f'<{word}>'
+            for i in range(len(padded) - self.ngram + 1):
+                vector[self._bucket(f'c:{padded[i:i + self.ngram]}')] += self.ngram_weight
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _bucket(self, feature):
+        # crc32 is stable across processes, unlike the salted built-in hash()
+        return zlib.crc32(feature.encode()) % self.dim
+
+
+class SemanticCache:
+    """
+    Nearest-neighbour cache over the prompt history of stored websites.
+
+    Embeddings live in a preallocated NumPy matrix; a lookup is one
+    matrix-vector product over the rows with the same template and
+    partition, run outside the lock on a snapshot of the index. Only LLM-generated websites (rows with a
+    cache_key) are indexed, so mock fallbacks are never served as hits.
+    Matches are restricted to websites built from the same base template
+    and whose prompts classify the same (site category and theme), so e.g.
+    "dark bakery site" never matches "light bakery site".
+    """
+
+    NO_TEMPLATE = -1
+
+    def __init__(self, embedder=None, threshold=0.85, max_entries=20_000, enabled=True):
+        self.embedder = embedder or HashingEmbedder()
+        self.threshold = threshold
+        # Eviction keeps half the entries, so there must be room for one more
+        self.max_entries = max(2, max_entries)
+        self.enabled = enabled
+        capacity = min(1024, self.max_entries)
+        self._vectors = np.zeros((capacity, self.embedder.dim), dtype=np.float32)
+        self._template_ids = np.full(capacity, self.NO_TEMPLATE, dtype=np.int64)
+        self._partitions = np.zeros(capacity, dtype=np.int16)
+        self._website_ids = []
+        self._loaded = False
+        self._counters = {'hits': 0, 'misses': 0}
+        self._lock = threading.Lock()
+
+    def add(self, prompt, website_id, template_id=None):
+        """Index the prompt of a stored website."""
+        if not self.enabled:
+            return
+        vector = self.embedder.embed(prompt)
+        partition = prompt_partition(classify_prompt(prompt))
+        with self._lock:
+            self._append(vector, website_id, template_id, partition)
+
+    def lookup(self, prompt, template_id=None):
+        """Return (website_id, similarity) of the closest indexed prompt above the threshold."""
+        vector = self.embedder.embed(prompt)
+        partition = prompt_partition(classify_prompt(prompt))
+        # Rows below count are never written again (eviction and growth
+        # allocate new arrays), so the snapshot can be scanned without the lock
+        with self._lock:
+            count = len(self._website_ids)
+            vectors, template_ids, partitions = self._vectors, self._template_ids, self._partitions
+            website_ids = self._website_ids
+        if not count:
+            return None
+        wanted = self.NO_TEMPLATE if template_id is None else template_id
+        rows = np.flatnonzero((template_ids[:count] == wanted) & (partitions[:count] == partition))
+        if not len(rows):
+            return None
+        scores = vectors[rows] @ vector
+        best = int(np.argmax(scores))
+        score = float(scores[best])
+        website_id = website_ids[rows[best]]
+        if score < self.threshold:
+            return None
+        return website_id, score
+
+    def get(self, prompt, db, template_id=None):
+        """Return the stored result for a near-duplicate prompt, or None."""
+        if not self.enabled:
+            return None
+        self.ensure_loaded(db)
+        match = self.lookup(prompt, template_id)
+        website = db.query(GeneratedWebsite).get(match[0]) if match else None
+        if website is None:
+            self._count('misses')
+            return None
+        self._count('hits')
+        return {
+            'html': website.html_code or '',
+            'css': website.css_code or '',
+            'js': website.js_code or '',
+            'similarity': match[1],
+        }
+
+    def ensure_loaded(self, db):
+        """Warm the index from prompt history on first use."""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            rows = (
+                db.query(Project.prompt, GeneratedWebsite.id, GeneratedWebsite.metadata_)
+                .join(GeneratedWebsite, GeneratedWebsite.project_id == Project.id)
+                .filter(GeneratedWebsite.cache_key.isnot(None))
+                .order_by(GeneratedWebsite.id.desc())
+                .limit(self.max_entries)
+                .all()
+            )
+            rows.reverse()
+            classifications = classify_prompts([prompt for prompt, _, _ in rows])
+            for (prompt, website_id, metadata), classification in zip(rows, classifications):
+                template_id = (metadata or {}).get('template_id')
+                self._append(
+                    self.embedder.embed(prompt), website_id, template_id, prompt_partition(classification)
+                )
+            self._loaded = True
+
+    def stats(self):
+        with self._lock:
+            return {**self._counters, 'entries': len(self._website_ids), 'threshold': self.threshold}
+
+    def _append(self, vector, website_id, template_id, partition):
+        count = len(self._website_ids)
+        if count >= self.max_entries:
+            # Drop the oldest half rather than shifting on every insert
+            keep = max(1, self.max_entries // 2)
+            self._reallocate(count - keep, count, len(self._vectors))
+            self._website_ids = self._website_ids[count - keep:]
+            count = keep
+        if count == len(self._vectors):
+            self._reallocate(0, count, min(count * 2, self.max_entries))
+
+        self._vectors[count] = vector
+        self._template_ids[count] = self.NO_TEMPLATE if template_id is None else template_id
+        self._partitions[count] = partition
+        self._website_ids.append(website_id)
+
+    def _reallocate(self, start, stop, capacity):
+        # Fresh arrays holding rows start..stop; lookups may still be reading the old ones
+        vectors = np.zeros((capacity, self.embedder.dim), dtype=np.float32)
+        vectors[:stop - start] = self._vectors[start:stop]
+        template_ids = np.full(capacity, self.NO_TEMPLATE, dtype=np.int64)
+        template_ids[:stop - start] = self._template_ids[start:stop]
+        partitions = np.zeros(capacity, dtype=np.int16)
+        partitions[:stop - start] = self._partitions[start:stop]
+        self._vectors, self._template_ids, self._partitions = vectors, template_ids, partitions
+
+    def _count(self, counter):
+        with self._lock:
+            self._counters[counter] += 1
+
+
+# Module-level singleton
+semantic_cache = SemanticCache(
+    embedder=HashingEmbedder(dim=settings.SEMANTIC_CACHE_DIM),
+    threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+    max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+    enabled=settings.SEMANTIC_CACHE_ENABLED,
+)
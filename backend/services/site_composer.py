@@ -0,0 +1,147 @@
+"""
+Assemble complete sites from the component templates library, without an LLM.
+
+One template is picked per section category from prompt keywords; the
+sections' markup is placed in a page shell, their CSS merged with duplicate
+rules dropped, and their scripts concatenated.
+"""
+import re
+from functools import lru_cache
+from html import escape
+
+from services.code_parser import split_css_rules
+from services.template_renderer import CompiledTemplate
+
+# Page order of the sections; navbar, hero and footer are always included
+SECTION_ORDER = ('navbar', 'hero', 'card', 'gallery', 'form', 'footer')
+REQUIRED_SECTIONS = ('navbar', 'hero', 'footer')
+
+# Prompt words that ask for an optional section
+SECTION_TRIGGERS = {
+    'card': ('feature', 'features', 'pricing', 'price', 'plans', 'product', 'products', 'shop',
+             'store', 'team', 'services', 'profile'),
+    'gallery': ('gallery', 'portfolio', 'photo', 'photos', 'photography', 'images', 'showcase', 'work'),
+    'form': ('contact', 'form', 'signup', 'sign', 'register', 'booking', 'book', 'reservation',
+             'newsletter', 'subscribe', 'quote'),
+}
+
+# Prompt words favouring a particular template, by template name
+TEMPLATE_HINTS = {
+    'Minimal Navbar': ('minimal', 'simple', 'clean', 'portfolio', 'blog'),
+    'Mega Menu Navbar': ('shop', 'store', 'products', 'catalog', 'ecommerce', 'menu'),
+    'Sidebar Navigation': ('dashboard', 'admin', 'app', 'sidebar', 'panel'),
+    'Split Hero': ('product', 'app', 'saas', 'startup', 'landing'),
+    'Centered Hero': ('business', 'agency', 'company', 'simple', 'clean'),
+    'Video Background Hero': ('video', 'cinematic', 'travel', 'restaurant', 'event', 'film'),
+    'Gradient Hero': ('gradient', 'colorful', 'vibrant', 'creative', 'modern'),
+    'Animated Particles Hero': ('tech', 'ai', 'futuristic', 'animated', 'dark', 'innovation'),
+    'Floating Label Form': ('contact', 'message', 'newsletter', 'subscribe'),
+    'Multi-Step Form': ('booking', 'registration', 'register', 'signup', 'onboarding', 'quote'),
+    'Masonry Gallery': ('photography', 'photos', 'art', 'pinterest'),
+    'Carousel Gallery': ('slider', 'carousel', 'showcase', 'restaurant', 'travel'),
+    'Lightbox Grid Gallery': ('gallery', 'portfolio', 'images', 'grid'),
+    'Multi-Column Footer': ('business', 'company', 'agency', 'shop', 'store'),
+    'Minimal Footer': ('minimal', 'simple', 'portfolio', 'blog', 'personal'),
+    'Mega Footer': ('newsletter', 'ecommerce', 'enterprise', 'large'),
+    'Product Card': ('product', 'products', 'shop', 'store', 'ecommerce'),
+    'Profile Card': ('team', 'profile', 'about', 'portfolio', 'personal'),
+    'Pricing Card': ('pricing', 'price', 'plans', 'subscription', 'saas'),
+    'Feature Card': ('feature', 'features', 'services', 'benefits'),
+}
+
+PAGE = CompiledTemplate("""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{title}</title>
+</head>
+<body>
+{sections}
+</body>
+</html>""")
+
+# Component cards are single items; show a row of them
+CARD_ROW = CompiledTemplate('<section class="composed-cards"><div class="composed-cards-row">{cards}</div></section>')
+
+BASE_CSS = (
+    "*{margin:0;padding:0;box-sizing:border-box}"
+    "body{font-family:'Inter',system-ui,sans-serif;line-height:1.6}"
+    "section{padding:4rem 2rem}"
+    ".composed-cards-row{display:flex;flex-wrap:wrap;justify-content:center;gap:2rem}"
+)
+
+_WORD = re.compile(r"[a-z0-9]+")
+_TAG = re.compile(r"<(/?[a-zA-Z][\w-]*)")
+
+
+def prompt_words(prompt):
+    return set(_WORD.findall(prompt.lower()))
+
+
+def select_sections(prompt, templates_by_category, classification=None):
+    """
+    Pick one template per section for the prompt.
+
+    Returns a list of (category, template) in page order. Within a category the
+    template with the most hint words in the prompt wins; ties keep the
+    library's order, so the choice is deterministic. A prompt_classifier
+    result adds the site category and theme as hint words.
+    """
+    words = prompt_words(prompt)
+    if classification:
+        words.add(classification['category'])
+        if classification['theme']:
+            words.add(classification['theme'])
+    selected = []
+    for category in SECTION_ORDER:
+        candidates = templates_by_category.get(category)
+        if not candidates:
+            continue
+        if category not in REQUIRED_SECTIONS and not words.intersection(SECTION_TRIGGERS.get(category, ())):
+            continue
+        best = max(candidates, key=lambda t: len(words.intersection(TEMPLATE_HINTS.get(t['name'], ()))))
+        selected.append((category, best))
+    return selected
+
+
+@lru_cache(maxsize=256)
+def merge_css(stylesheets):
+    """Concatenate stylesheets, dropping rules already emitted verbatim by an earlier one."""
+    seen = set()
+    merged = []
+    for css in (BASE_CSS,) + stylesheets:
+        for rule in split_css_rules(css):
+            if rule and rule not in seen:
+                seen.add(rule)
+                merged.append(rule)
+    return '\n'.join(merged)
+
+
+def compose_site(prompt, templates_by_category, title=None, classification=None):
+    """
+    Build a {'html', 'css', 'js', 'sections'} site for the prompt from component templates.
+
+    ``sections`` lists the chosen template ids in page order.
+    """
+    title = title or (classification['title'] if classification else 'My Website')
+    selected = select_sections(prompt, templates_by_category, classification)
+
+    markup = []
+    for category, template in selected:
+        html = template['html_template'] or ''
+        if category == 'card':
+            html = CARD_ROW.render({'cards': html * 3})
+        markup.append(html.replace('Brand', escape(title)))
+
+    return {
+        'html': PAGE.render({'title': escape(title), 'sections': '\n'.join(markup)}),
+        'css': merge_css(tuple(t['css_template'] or '' for _, t in selected)),
+        'js': '\n\n'.join(t['js_template'] for _, t in selected if t['js_template']),
+        'sections': [t['id'] for _, t in selected],
+    }
+
+
+def same_structure(html, other):
+    """True if both documents have the same sequence of tags (text may differ)."""
+    return _TAG.findall(html) == _TAG.findall(other)
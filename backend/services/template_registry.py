@@ -0,0 +1,145 @@
+import hashlib
+import threading
+import time
+from collections import namedtuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from config import settings
+from models import SessionLocal, Template
+from services.prompt_budget import minify_template
+
+
+def render_prompt_fragment(template):
+    """The part of the LLM prompt that seeds generation with a (minified) base template."""
+    return (
+        "Use the following template as a starting point and customize it based on the user's request:\n"
+        f"Template HTML:\n{template.get('html_template', '')}\n"
+        f"Template CSS:\n{template.get('css_template', '')}\n\n"
+    )
+
+
+def template_content_hash(template):
+    """Hash of the template parts that shape generation (used in cache keys)."""
+    return hashlib.sha256(
+        f"{template.get('html_template') or ''}\0{template.get('css_template') or ''}".encode()
+    ).hexdigest()
+
+
+_Snapshot = namedtuple('_Snapshot', 'version expires_at by_id by_category ordered fragments hashes')
+
+
+class TemplateRegistry:
+    """
+    In-process copy of the templates table, indexed by id and category.
+
+    The table is loaded once and reloaded only after the version counter
+    moves (any committed insert/update/delete of a Template in this process)
+    or, to pick up changes made by other processes, after ``ttl`` seconds.
+    Returned dicts are shared; treat them as read-only.
+    """
+
+    def __init__(self, session_factory=SessionLocal, ttl=300):
+        self.session_factory = session_factory
+        self.ttl = ttl
+        self.version = 0
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        self.version += 1
+
+    def get(self, template_id):
+        """Template dict by id, or None."""
+        return self._current().by_id.get(template_id)
+
+    def list(self, category=None):
+        """Templates ordered by category and name, optionally for one category."""
+        snapshot = self._current()
+        if category:
+            return list(snapshot.by_category.get(category, ()))
+        return list(snapshot.ordered)
+
+    def by_category(self):
+        """Mapping of category to its templates (ordered by name)."""
+        return self._current().by_category
+
+    def prompt_fragment(self, template):
+        """Pre-rendered, minified prompt fragment for a registry template (rendered on the fly otherwise)."""
+        snapshot = self._current()
+        if snapshot.by_id.get(template.get('id')) is template:
+            return snapshot.fragments[template['id']]
+        return render_prompt_fragment(minify_template(template))
+
+    def content_hash(self, template):
+        """Precomputed template_content_hash for a registry template."""
+        snapshot = self._current()
+        if snapshot.by_id.get(template.get('id')) is template:
+            return snapshot.hashes[template['id']]
+        return template_content_hash(template)
+
+    def _is_fresh(self, snapshot):
+        return (
+            snapshot is not None
+            and snapshot.version == self.version
+            and (snapshot.expires_at is None or time.monotonic() < snapshot.expires_at)
+        )
+
+    def _current(self):
+        snapshot = self._snapshot
+        if not self._is_fresh(snapshot):
+            snapshot = self._load()
+        return snapshot
+
+    def _load(self):
+        with self._lock:
+            if self._is_fresh(self._snapshot):
+                return self._snapshot
+            version = self.version
+
+            db = self.session_factory()
+            try:
+                ordered = [t.to_dict() for t in db.query(Template).order_by(Template.category, Template.name)]
+            finally:
+                db.close()
+
+            by_category = {}
+            for template in ordered:
+                by_category.setdefault(template['category'], []).append(template)
+            snapshot = _Snapshot(
+                version,
+                time.monotonic() + self.ttl if self.ttl else None,
+                {t['id']: t for t in ordered},
+                by_category,
+                ordered,
+                {t['id']: render_prompt_fragment(minify_template(t)) for t in ordered},
+                {t['id']: template_content_hash(t) for t in ordered},
+            )
+            # Swapped in one assignment, so readers never need the lock
+            self._snapshot = snapshot
+            return snapshot
+
+
+template_registry = TemplateRegistry(ttl=settings.TEMPLATE_REGISTRY_TTL)
+
+
+# Template writes bump the version once their transaction commits
+@event.listens_for(Template, 'after_insert')
+@event.listens_for(Template, 'after_update')
+@event.listens_for(Template, 'after_delete')
+def _mark_templates_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info['templates_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_templates(session):
+    if session.info.pop('templates_changed', False):
+        template_registry.invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_template_changes(session):
+    session.info.pop('templates_changed', None)
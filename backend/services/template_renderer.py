@@ -0,0 +1,36 @@
+from string import Formatter
+
+
+class CompiledTemplate:
+    """
+    A str.format-style template split into static segments once, up front.
+
+    Rendering fills the named ``{field}`` slots and joins the pieces, without
+    re-parsing the template or evaluating any per-call expressions. Literal
+    braces are written ``{{`` and ``}}`` as in str.format.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self._literals = []
+        self._slots = []
+        pending = ''
+        for literal, field, format_spec, conversion in Formatter().parse(source):
+            # Escaped braces arrive as separate literal pieces; merge them
+            pending += literal
+            if field is None:
+                continue
+            if format_spec or conversion or not field.isidentifier():
+                raise ValueError(f"Template fields must be plain names, got {field!r}")
+            self._literals.append(pending)
+            self._slots.append(field)
+            pending = ''
+        self._literals.append(pending)
+        self.fields = frozenset(self._slots)
+
+    def render(self, values):
+        """Render with a mapping of field name to string value."""
+        pieces = [None] * (len(self._literals) + len(self._slots))
+        pieces[::2] = self._literals
+        pieces[1::2] = [values[field] for field in self._slots]
+        return ''.join(pieces)
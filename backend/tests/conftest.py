@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Modules read settings and build engines at import time; use an in-memory database
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
@@ -0,0 +1,38 @@
+import json
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import routes.api as api
+from models import Base, get_engine
+
+
+def test_batch_items_finishing_close_together_share_one_save(monkeypatch):
+    Base.metadata.create_all(get_engine())
+
+    def generate(item):
+        # Staggered finishes, as with real generations
+        time.sleep(0.01 * int(item.prompt.split()[-1]))
+        return {'html': f'<p>{item.prompt}</p>', 'css': '', 'js': ''}
+
+    saves = []
+    save_batch = api._save_batch
+
+    def counting_save(generated):
+        saves.append(len(generated))
+        return save_batch(generated)
+
+    monkeypatch.setattr(api, '_generate_batch_item', generate)
+    monkeypatch.setattr(api, '_save_batch', counting_save)
+    app = FastAPI()
+    app.include_router(api.router, prefix='/api')
+
+    items = [{'prompt': f'site {i}'} for i in range(6)]
+    response = TestClient(app).post('/api/generate/batch', json={'items': items, 'concurrency': 6})
+    events = [json.loads(line) for line in response.text.splitlines()]
+
+    assert events[-1] == {'type': 'complete', 'total': 6, 'succeeded': 6, 'failed': 0}
+    assert sorted(event['index'] for event in events if event['type'] == 'item') == list(range(6))
+    assert sum(saves) == 6
+    assert len(saves) <= 2
@@ -0,0 +1,36 @@
+from services.code_parser import parse_generated_code, scan_code_blocks
+
+
+def test_fenced_blocks():
+    blocks = scan_code_blocks("```html\n<p>a</p>\n```\n```css\np{}\n```\n```javascript\nf()\n```")
+    assert blocks == {'html': ['<p>a</p>'], 'css': ['p{}'], 'js': ['f()'], 'unterminated': False}
+
+
+def test_multiple_blocks_per_language_are_kept_in_order():
+    blocks = scan_code_blocks("```css\na{}\n```\ntext\n```html\n<p></p>\n```\n```css\nb{}\n```\n```js\nx()\n```")
+    assert blocks['css'] == ['a{}', 'b{}']
+    assert blocks['js'] == ['x()']
+    assert parse_generated_code("```css\na{}\n```\n```css\nb{}\n```")['css'] == 'a{}\n\nb{}'
+
+
+def test_labels():
+    blocks = scan_code_blocks("HTML:\n<p>a</p>\nCSS:\np { color: red; }\nJavaScript:\nf()")
+    assert blocks['html'] == ['<p>a</p>']
+    assert blocks['css'] == ['p { color: red; }']
+    assert blocks['js'] == ['f()']
+
+
+def test_unlabeled_fence_inside_a_labeled_section():
+    blocks = scan_code_blocks("Here you go.\nCSS:\n```\np{}\n```\nHTML:\n```\n<p></p>\n```")
+    assert blocks['css'] == ['p{}']
+    assert blocks['html'] == ['<p></p>']
+
+
+def test_unterminated_fence_runs_to_the_end():
+    blocks = scan_code_blocks("```html\n<p>a</p>\n```\n```css\nbody { margin: 0;")
+    assert blocks['unterminated'] is True
+    assert blocks['css'] == ['body { margin: 0;']
+
+
+def test_output_without_blocks_is_html():
+    assert parse_generated_code('<h1>Hi</h1>') == {'html': '<h1>Hi</h1>', 'css': '', 'js': ''}
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from services.code_parser import find_truncation, stitch_continuation
+from services.llm_service import LLMService
+
+SITE = (
+    "```html\n<!DOCTYPE html><html><body><h1>Bakery</h1></body></html>\n```\n\n"
+    "```css\nbody { margin: 0; font-family: sans-serif; }\nh1 { color: #e63946; padding: 2rem; }\n```\n\n"
+    "```javascript\ndocument.querySelector('h1').addEventListener('click', () => alert('hi'));\n```\n"
+)
+CUT = SITE.index('padding')  # cut off mid-CSS
+# The model restarts a little before the cut, finishes the CSS, writes the
+# JavaScript and repeats the HTML it was told was already complete
+CONTINUATION = (
+    SITE[CUT - 24:SITE.index('```javascript')]
+    + "```html\n<html><body>again</body></html>\n```\n\n"
+    + SITE[SITE.index('```javascript'):]
+)
+
+
+@pytest.fixture
+def service():
+    service = LLMService()
+    service.api_token = 'test'
+    return service
+
+
+def test_cut_in_css_is_truncated():
+    assert find_truncation(SITE[:CUT]) == 'unterminated_fence'
+    assert find_truncation(SITE) is None
+
+
+def test_stitch_keeps_missing_blocks_and_drops_repeated_ones():
+    stitched = stitch_continuation(SITE[:CUT], CONTINUATION)
+    assert 'again' not in stitched
+    assert find_truncation(stitched) is None
+    assert stitched.count('```javascript') == 1
+
+
+def _check_result(result):
+    assert result['html'] == '<!DOCTYPE html><html><body><h1>Bakery</h1></body></html>'
+    assert result['css'].endswith('h1 { color: #e63946; padding: 2rem; }')
+    assert result['js'].startswith("document.querySelector('h1')")
+
+
+def test_call_hf_api_resumes_cut_in_css(service):
+    responses = [SITE[:CUT], CONTINUATION]
+    service._request_text = lambda prompt, max_new_tokens=None: responses.pop(0)
+    result = service._call_hf_api('prompt', 100)
+    _check_result(result)
+    assert result['continuations'] == 1
+
+
+def test_acall_hf_api_resumes_cut_in_css(service):
+    responses = [SITE[:CUT], CONTINUATION]
+
+    async def request_text(prompt, max_new_tokens=None):
+        return responses.pop(0)
+
+    service._arequest_text = request_text
+    _check_result(asyncio.run(service._acall_hf_api('prompt', 100)))
+
+
+def _chunks(text, size=7):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_stream_resumes_cut_in_css(service):
+    streams = [_chunks(SITE[:CUT]), _chunks(CONTINUATION)]
+    service._stream_hf_api = lambda prompt, max_new_tokens=None: iter(streams.pop(0))
+    _check_result(service._parse_code(''.join(service.stream_website('a bakery'))))
+
+
+def test_astream_resumes_cut_in_css(service):
+    streams = [_chunks(SITE[:CUT]), _chunks(CONTINUATION)]
+
+    async def stream(prompt, max_new_tokens=None):
+        for chunk in streams.pop(0):
+            yield chunk
+
+    service._astream_hf_api = stream
+
+    async def collect():
+        return ''.join([chunk async for chunk in service.astream_website('a bakery')])
+
+    _check_result(service._parse_code(asyncio.run(collect())))
@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+
+from database.gc_code_blobs import collect
+from models import Base, CodeBlob, GeneratedWebsite, Project, SessionLocal, get_engine
+
+
+PAGE = ''.join(f'<p>Paragraph {i}: {i * 7919 % 10007} visitors this week</p>\n' for i in range(200))
+
+
+def test_unreachable_blobs_are_deleted_and_delta_bases_kept():
+    Base.metadata.create_all(get_engine())
+    db = SessionLocal()
+    try:
+        project = Project(project_name='gc', prompt='gc')
+        kept = GeneratedWebsite(html_code=PAGE, css_code='', js_code='')
+        project.generated_websites.append(kept)
+        db.add(project)
+        db.commit()
+        # A new version stored as a delta on the first, then the first version deleted
+        newer = GeneratedWebsite(project_id=project.id, html_code=PAGE + '<p>More</p>\n', css_code='', js_code='')
+        db.add(newer)
+        db.commit()
+        base_hash, newer_hash = kept.html_hash, newer.html_hash
+        gone = GeneratedWebsite(project_id=project.id, html_code='<p>deleted later</p>', css_code='', js_code='')
+        db.add(gone)
+        db.commit()
+        gone_hash = gone.html_hash
+        db.delete(kept)
+        db.delete(gone)
+        db.commit()
+        db.query(CodeBlob).update({CodeBlob.created_at: datetime.utcnow() - timedelta(days=1)})
+        db.commit()
+    finally:
+        db.close()
+
+    assert collect() >= 1
+
+    db = SessionLocal()
+    try:
+        remaining = {blob.hash for blob in db.query(CodeBlob)}
+        assert newer_hash in remaining
+        assert db.get(CodeBlob, newer_hash).base_hash == base_hash
+        assert base_hash in remaining
+        assert gone_hash not in remaining
+    finally:
+        db.close()
@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta
+
+from models import Base, GenerationJob, SessionLocal, get_engine
+from services.job_queue import INTERRUPTED_ERROR, JobQueue, SqlJobStore
+
+
+def _add_job(job_id, status, age):
+    db = SessionLocal()
+    try:
+        db.add(GenerationJob(id=job_id, status=status, created_at=datetime.utcnow() - age))
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_orphaned_jobs_are_failed():
+    Base.metadata.create_all(get_engine())
+    queue = JobQueue(SqlJobStore(), stale_after=60)
+    _add_job('orphan-queued', 'queued', timedelta(hours=1))
+    _add_job('orphan-running', 'running', timedelta(hours=1))
+    _add_job('recent', 'running', timedelta(seconds=5))
+
+    assert queue.recover() == 2
+    assert queue.get('orphan-queued')['status'] == 'failed'
+    assert queue.get('orphan-running')['error'] == INTERRUPTED_ERROR
+    assert queue.get('recent')['status'] == 'running'
+
+
+def test_polling_fails_a_job_that_went_stale():
+    Base.metadata.create_all(get_engine())
+    queue = JobQueue(SqlJobStore(), stale_after=60)
+    _add_job('stale-poll', 'queued', timedelta(minutes=5))
+    assert queue.get('stale-poll')['status'] == 'failed'
@@ -0,0 +1,21 @@
+import pytest
+
+from services.prompt_budget import PromptBudget, PromptTooLong, estimate_tokens
+
+
+def test_long_runs_and_digits_are_not_undercounted():
+    assert estimate_tokens('x' * 40000) == 10000
+    assert estimate_tokens('#6c63ff') >= 6
+    assert estimate_tokens('255') == 3
+
+
+def test_max_new_tokens_leaves_the_safety_margin():
+    budget = PromptBudget(context_window=4096, max_new_tokens=4096, min_new_tokens=1024)
+    prompt, usage = budget.build('System. ', 'word ' * 1000)
+    assert usage['prompt_tokens'] + usage['max_new_tokens'] + budget.safety_margin == 4096
+
+
+def test_data_uri_prompt_is_rejected():
+    budget = PromptBudget(context_window=4096, max_new_tokens=2048, min_new_tokens=1024)
+    with pytest.raises(PromptTooLong):
+        budget.build('System. ', 'data:image/png;base64,' + 'A' * 40000)
@@ -0,0 +1,31 @@
+import pytest
+
+from services.prompt_classifier import GENERIC, classify_prompt
+
+
+@pytest.mark.parametrize('prompt, category', [
+    ('Italian restaurants downtown', 'restaurant'),
+    ('a site for my blogs', 'blog'),
+    ('shopping site for sneakers', 'ecommerce'),
+    ('two stores selling shoes', 'ecommerce'),
+    ('portfolio-style page for a painter', 'portfolio'),
+    ('landing-page for our startup', 'landing_page'),
+    ('e-commerce store for tea', 'ecommerce'),
+    ('photographers showcase', 'portfolio'),
+    ('something nice', GENERIC),
+])
+def test_category(prompt, category):
+    assert classify_prompt(prompt)['category'] == category
+
+
+def test_inflections_do_not_match_inside_other_words():
+    result = classify_prompt('a reddish appetizer')
+    assert result['colors'] == {}
+    assert result['category'] == GENERIC
+
+
+def test_theme_and_colors():
+    result = classify_prompt('Dark-mode cafe in navy and gold')
+    assert result['category'] == 'restaurant'
+    assert result['theme'] == 'dark'
+    assert list(result['colors']) == ['navy', 'gold']
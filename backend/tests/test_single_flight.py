@@ -0,0 +1,42 @@
+import asyncio
+
+from services.llm_service import AsyncSingleFlight
+
+
+def test_cancelling_the_first_caller_does_not_cancel_followers():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def generate(prompt):
+        calls.append(prompt)
+        await asyncio.sleep(0.05)
+        return {'html': prompt}
+
+    async def main():
+        leader = asyncio.ensure_future(flight.do('key', generate, 'p'))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do('key', generate, 'p'))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        result = await follower
+        return leader.cancelled(), result
+
+    leader_cancelled, result = asyncio.run(main())
+    assert leader_cancelled
+    assert result == {'html': 'p'}
+    assert calls == ['p']
+    assert flight.in_flight == 0
+
+
+def test_errors_reach_every_caller():
+    flight = AsyncSingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError('upstream down')
+
+    async def main():
+        return await asyncio.gather(flight.do('k', fail), flight.do('k', fail), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert [str(r) for r in results] == ['upstream down', 'upstream down']
@@ -0,0 +1,37 @@
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from models import Base, GeneratedWebsite, SessionLocal, get_engine
+from routes.api import router
+from services.llm_service import llm_service
+
+
+def test_interrupted_stream_reports_error_and_saves_nothing(monkeypatch):
+    Base.metadata.create_all(get_engine())
+    db = SessionLocal()
+    try:
+        saved_before = db.query(GeneratedWebsite).count()
+    finally:
+        db.close()
+
+    async def broken_stream(prompt, max_new_tokens=None):
+        yield "```html\n<h1>Hi"
+        raise RuntimeError('upstream connection reset')
+
+    monkeypatch.setattr(llm_service, 'api_token', 'test')
+    monkeypatch.setattr(llm_service, '_astream_hf_api', broken_stream)
+    app = FastAPI()
+    app.include_router(router, prefix='/api')
+
+    response = TestClient(app).post('/api/generate/stream', json={'prompt': 'a bakery'})
+    events = [json.loads(line) for line in response.text.splitlines()]
+
+    assert events[-1] == {'type': 'error', 'detail': 'upstream connection reset'}
+    assert not any(event['type'] == 'complete' for event in events)
+    db = SessionLocal()
+    try:
+        assert db.query(GeneratedWebsite).count() == saved_before
+    finally:
+        db.close()